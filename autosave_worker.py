@@ -0,0 +1,136 @@
+import atexit
+import logging
+import signal
+import threading
+import time
+import weakref
+
+log = logging.getLogger("game_engine.autosave")
+
+class AutosaveWorker:
+    """
+    Writes autosaves on a background thread so the game loop never waits on disk.
+
+    `request()` hands over a snapshot and returns at once. Requests arriving within
+    `debounce` seconds of each other are coalesced and only the newest snapshot is
+    written; a steady stream of requests is still written at least every `max_delay`
+    seconds. `flush()` writes anything pending before returning; it runs on interpreter
+    exit and, with `install_exit_handlers()`, on SIGTERM/SIGHUP.
+    """
+
+    def __init__(self, write, debounce: float = 1.0, max_delay: float = 5.0):
+        """
+        Parameters:
+        - write (callable): Takes a snapshot and writes it (called on the worker thread).
+        - debounce (float): Quiet period, in seconds, before a pending snapshot is written.
+        - max_delay (float): Longest a snapshot waits while requests keep coming.
+        """
+        self.write = write
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.requests = 0
+        self.writes = 0
+        self._pending = None
+        self._first_request = 0.0
+        self._last_request = 0.0
+        self._writing = False
+        self._flushing = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._worker.start()
+        _workers.add(self)
+
+    def request(self, snapshot):
+        """Queues a snapshot for writing, replacing any that is still pending."""
+        with self._cond:
+            now = time.monotonic()
+            if self._pending is None:
+                self._first_request = now
+            self._pending = snapshot
+            self._last_request = now
+            self.requests += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Writes the pending snapshot now and waits for it. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                while self._pending is not None or self._writing:
+                    if not self._worker.is_alive():
+                        return False
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: float = None):
+        """Flushes and stops the worker thread."""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                # Debounce: wait for a quiet period, unless flushing or the snapshot has waited long enough
+                while not self._flushing and not self._closed:
+                    due = min(self._last_request + self.debounce, self._first_request + self.max_delay)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                snapshot, self._pending = self._pending, None
+                self._writing = True
+
+            try:
+                self.write(snapshot)
+            except Exception:
+                log.exception("Autosave failed")
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self.writes += 1
+                    self._cond.notify_all()
+
+# 📌 Flush on Exit
+_workers = weakref.WeakSet()
+
+def flush_all(timeout: float = 5.0):
+    """Flushes every live autosave worker."""
+    for worker in list(_workers):
+        worker.flush(timeout)
+
+atexit.register(flush_all)
+
+def install_exit_handlers(signals=("SIGTERM", "SIGHUP")):
+    """
+    Flushes pending autosaves when the process is told to stop, then hands the signal
+    to the previous handler (or exits). Must be called from the main thread.
+    """
+    for name in signals:
+        signum = getattr(signal, name, None)
+        if signum is None:
+            continue  # e.g. SIGHUP on Windows
+        previous = signal.getsignal(signum)
+
+        def handler(received, frame, previous=previous):
+            flush_all()
+            if callable(previous):
+                previous(received, frame)
+            elif previous != signal.SIG_IGN:
+                raise SystemExit(128 + received)
+
+        signal.signal(signum, handler)
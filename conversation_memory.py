@@ -0,0 +1,109 @@
+import threading
+from collections import deque
+from prompt_templates import CHARS_PER_TOKEN, DEFAULT_CHARS_PER_TOKEN, estimate_tokens
+
+class ConversationMemory:
+    """
+    Bounded memory for an interactive DM session.
+
+    The last `max_turns` turns are kept verbatim. Older turns are folded into a running
+    summary on a background thread, and every prompt built from this memory is trimmed to
+    `token_budget` tokens, so prompt size stays flat no matter how long the session runs.
+    """
+
+    def __init__(self, summarize, max_turns: int = 6, token_budget: int = 1500, summary_tokens: int = 300,
+                 backend: str = None):
+        """
+        Parameters:
+        - summarize (callable): Takes a summarization prompt and returns the model's text.
+        - max_turns (int): Number of recent turns kept word for word.
+        - token_budget (int): Upper bound for history plus the new prompt.
+        - summary_tokens (int): Target length of the running summary.
+        - backend (str): DM backend whose tokenizer the budget is estimated for (see prompt_templates).
+        """
+        self.summarize = summarize
+        self.backend = backend
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.turns = deque()
+        self._pending = []  # Turns that left the window but are not in the summary yet
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def add_turn(self, prompt: str, response: str, speaker: str = "Player"):
+        """Records one exchange; turns pushed out of the window are summarized in the background."""
+        with self._lock:
+            self.turns.append(f"{speaker}: {prompt}\nDM: {response}")
+            while len(self.turns) > self.max_turns:
+                self._pending.append(self.turns.popleft())
+            if self._pending and (self._worker is None or not self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._fold_pending, daemon=True)
+                self._worker.start()
+
+    def _fold_pending(self):
+        """Folds pending turns into the running summary until none are left."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch = list(self._pending)
+                summary = self.summary
+
+            prompt = (
+                f"Update the running summary of a TTRPG session in at most {self.summary_tokens * 3 // 4} words.\n"
+                "Keep names, locations, decisions and unresolved threads. Reply with the summary only.\n\n"
+                f"Current summary:\n{summary or '(none yet)'}\n\n"
+                "New events:\n" + "\n\n".join(batch)
+            )
+            try:
+                new_summary = self.summarize(prompt).strip()
+            except Exception:
+                new_summary = ""
+
+            with self._lock:
+                if new_summary:
+                    self.summary = new_summary
+                    del self._pending[:len(batch)]
+                else:
+                    # Keep the turns pending so nothing is lost; retry on the next add_turn.
+                    return
+
+    def build_prompt(self, prompt: str) -> str:
+        """
+        Prepends the session history to a prompt, dropping the oldest material until the
+        result fits within the token budget. The new prompt itself is always kept.
+        """
+        with self._lock:
+            summary = self.summary
+            history = self._pending + list(self.turns)
+
+        budget = self.token_budget - estimate_tokens(prompt, self.backend)
+        if summary:
+            summary_limit = max(0, min(estimate_tokens(summary, self.backend), budget // 3))
+            summary = summary[:int(summary_limit * CHARS_PER_TOKEN.get(self.backend, DEFAULT_CHARS_PER_TOKEN))]
+            budget -= estimate_tokens(summary, self.backend)
+
+        kept = []
+        for turn in reversed(history):
+            cost = estimate_tokens(turn, self.backend) + 1
+            if cost > budget:
+                break
+            kept.append(turn)
+            budget -= cost
+        kept.reverse()
+
+        sections = []
+        if summary:
+            sections.append(f"Story so far: {summary}")
+        if kept:
+            sections.append("Recent turns:\n" + "\n".join(kept))
+        sections.append(prompt)
+        return "\n\n".join(sections)
+
+    def wait(self, timeout: float = None):
+        """Blocks until any in-progress background summarization finishes."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
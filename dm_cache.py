@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join("cache", "dm_responses")
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for DM completions.
+
+    Each response is stored as its own JSON file named by the SHA-256 of the request
+    (processed prompt, backend, model, temperature, max_tokens). Entries expire after
+    `ttl_seconds`, and the least recently used ones are evicted once the cache grows past
+    `max_bytes`. File mtimes record last use, so LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = 50 * 1024 * 1024, ttl_seconds: float = 7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = None  # OrderedDict key -> size in bytes, least recently used first
+        self._total_bytes = 0
+
+    @staticmethod
+    def make_key(prompt: str, backend: str, model: str, temperature: float, max_tokens: int) -> str:
+        """Builds the cache key for a request."""
+        material = json.dumps([prompt, backend, model, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """Scans the cache directory once to rebuild the LRU order from file mtimes."""
+        if self._entries is not None:
+            return
+        found = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(".json"):
+                        continue
+                    stat = os.stat(os.path.join(root, name))
+                    found.append((stat.st_mtime, name[:-5], stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total_bytes = sum(self._entries.values())
+
+    def _remove(self, key: str):
+        size = self._entries.pop(key, 0)
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str):
+        """Returns the cached response for a key, or None on a miss or expired entry."""
+        with self._lock:
+            self._load_index()
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            if self.ttl_seconds and time.time() - entry.get("created", 0) > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            os.utime(path)  # Mark as recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["response"]
+
+    def put(self, key: str, response: str, **metadata):
+        """Stores a response, then evicts least recently used entries until under max_bytes."""
+        entry = dict(metadata, response=response, created=time.time())
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)  # Readers never see a half-written entry
+
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """Deletes every cached response."""
+        with self._lock:
+            self._load_index()
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and current cache size."""
+        with self._lock:
+            self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
@@ -1,145 +1,1066 @@
 import subprocess
+import codecs
+import asyncio
+import functools
+import hashlib
+import json
+import uuid
+import time
+import socket
+import threading
+import contextlib
 import openai  # If using OpenAI's API
 import os
 import logging
+from ollama_client import get_client, OllamaError, DEFAULT_OLLAMA_HOST
+from dm_cache import ResponseCache, CACHE_DIR
+from conversation_memory import ConversationMemory
+from dm_metrics import DMMetrics
+from prompt_templates import estimate_tokens
+from mock_dm import MockDMBackend, ReplayDMBackend, DMFixtures, FIXTURES_PATH
+from dm_scheduler import DMScheduler, PRIORITY_INTERACTIVE, PRIORITY_SUMMARY, PRIORITY_SPECULATIVE
+from dm_logging import configure_dm_logging, LOGGER_NAME
+from dm_resilience import (
+    DMBackendError, DMTimeoutError, CircuitOpenError, CircuitBreaker, FixtureMissing, call_with_retries
+)
 
-# Ensure the logs directory exists
+# Logging for DM interactions is set up on first use (see configure_logging)
 LOG_DIR = "logs"
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
-
-# Set up logging for DM interactions
 LOG_FILE = os.path.join(LOG_DIR, "dm_interface.log")
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s: %(message)s"
-)
+log = logging.getLogger(LOGGER_NAME)
 
 # DM Configuration Settings
 DM_CONFIG = {
     "tone": "epic",        # Options: epic, humorous, serious, etc.
     "randomness": 0.7,     # Temperature for DM responses.
     "log_file": LOG_FILE,
+    "log_level": "INFO",          # DEBUG/INFO log full prompts and responses; WARNING keeps only problems
+    "log_max_bytes": 5 * 1024 * 1024,  # Rotate (and gzip) the log past this size
+    "log_backup_count": 5,
     "max_tokens": 500,     # Limit AI response length
+    "context_tokens": 4096,       # Model context window (prompt + response)
+    "scene_prompt_tokens": 700,   # Target size of GameEngine scene prompts; longer ones are trimmed
+    "ollama_host": os.getenv("OLLAMA_HOST", DEFAULT_OLLAMA_HOST),
+    "keep_alive": "30m",   # How long Ollama keeps the model loaded between turns
+    "stream": True,        # Print DM responses token by token as they are generated
+    "lore_guard": "warn",  # Unknown names in DM output: "off", "warn" (log them) or "regenerate" (one rewrite)
+    "max_concurrent_prompts": 2,  # Limit for prompts dispatched together via gather_prompts
+    "cache_enabled": False,       # Reuse stored responses for identical prompts (opt-in)
+    "cache_dir": CACHE_DIR,
+    "cache_max_bytes": 50 * 1024 * 1024,
+    "cache_ttl_seconds": 7 * 24 * 3600,
+    "memory_turns": 6,            # Recent turns sent verbatim in interactive sessions
+    "memory_token_budget": 1500,  # Max tokens of history + player turn per request
+    "max_in_flight": 3,           # Concurrent generations per backend
+    "reserved_interactive_slots": 1,  # Slots background work (summaries, speculation) may not use
+    "request_timeout": 120,       # Seconds a single backend attempt may take
+    "turn_deadline": 300,         # Seconds for a whole request, across retries and fallbacks
+    "max_retries": 2,             # Retries per backend before moving down the fallback chain
+    "retry_base_delay": 0.5,
+    "retry_max_delay": 4.0,
+    "breaker_failure_threshold": 3,  # Consecutive failures that open a backend's circuit
+    "breaker_reset_seconds": 30,     # How long an open circuit refuses calls
+    "fallback_chain": {              # Backends tried, in order, when the chosen one fails
+        "deepseek": ["mistral"],
+        "openai": ["mistral"],
+        "mistral": [],
+        "mock": [],
+        "replay": [],
+    },
+    "mock_profile": "local_7b",   # Latency profile for the offline "mock" backend (see mock_dm.MOCK_PROFILES)
+    "mock_seed": 0,               # Changes every mock reply while keeping them reproducible
+    "fixtures_path": FIXTURES_PATH,
+    "record_fixtures": False,     # Append every successful reply to fixtures_path for later replay
+    "replay_profile": "instant",  # Latency profile used to pace replayed responses
+}
+
+DM_OPTIONS = ["openai", "mistral", "deepseek", "mock", "replay"]
+OPENAI_MODEL = "gpt-4"
+
+# Canned replies returned when every backend in the fallback chain fails; these are never cached
+OPENAI_ERROR_RESPONSE = "An error occurred while communicating with the OpenAI DM."
+MISTRAL_ERROR_RESPONSE = "An error occurred while communicating with the local AI."
+DEEPSEEK_ERROR_RESPONSE = "An error occurred while communicating with the local DeepSeek DM."
+MOCK_ERROR_RESPONSE = "An error occurred while communicating with the offline DM."
+BACKEND_ERROR_RESPONSES = {
+    "openai": OPENAI_ERROR_RESPONSE,
+    "mistral": MISTRAL_ERROR_RESPONSE,
+    "deepseek": DEEPSEEK_ERROR_RESPONSE,
+    "mock": MOCK_ERROR_RESPONSE,
+    "replay": MOCK_ERROR_RESPONSE,
 }
+ERROR_RESPONSES = set(BACKEND_ERROR_RESPONSES.values())
+
+INVALID_OPTION_RESPONSE = "Invalid DM option selected. Please restart and choose a valid AI model."
+# Replies that mean no backend was asked; early versions logged the short form
+INVALID_OPTION_RESPONSES = {INVALID_OPTION_RESPONSE, "Invalid DM option selected."}
+
+# Ollama-backed DM options. "http" talks to the Ollama server over a pooled keep-alive
+# connection; "cli" shells out to `ollama run` for every prompt (legacy behaviour).
+OLLAMA_BACKENDS = {
+    "mistral": {"model": "mistral:latest", "transport": "http"},
+    "deepseek": {"model": "deepseek-r1:latest", "transport": "http"},
+}
+
+# Shared by every session in this process so they queue fairly on each backend
+SCHEDULER = DMScheduler(
+    max_in_flight=DM_CONFIG["max_in_flight"],
+    reserved_interactive=DM_CONFIG["reserved_interactive_slots"],
+)
+
+def scheduler_stats() -> dict:
+    """Returns queue depth, in-flight requests and wait times per backend."""
+    return SCHEDULER.stats()
+
+_response_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Returns the shared DM response cache, creating it from DM_CONFIG on first use."""
+    global _response_cache
+    if _response_cache is None or _response_cache.cache_dir != DM_CONFIG.get("cache_dir", CACHE_DIR):
+        _response_cache = ResponseCache(
+            DM_CONFIG.get("cache_dir", CACHE_DIR),
+            max_bytes=DM_CONFIG.get("cache_max_bytes", 50 * 1024 * 1024),
+            ttl_seconds=DM_CONFIG.get("cache_ttl_seconds", 7 * 24 * 3600),
+        )
+    return _response_cache
+
+def cache_stats() -> dict:
+    """Returns hit/miss counters for the DM response cache."""
+    return get_response_cache().stats()
+
+def _model_name(dm_option: str) -> str:
+    """Model identifier used for a DM option."""
+    if dm_option in OLLAMA_BACKENDS:
+        return OLLAMA_BACKENDS[dm_option]["model"]
+    if dm_option == "mock":
+        return f"mock:{DM_CONFIG.get('mock_profile', 'local_7b')}:{DM_CONFIG.get('mock_seed', 0)}"
+    if dm_option == "replay":
+        return f"replay:{DM_CONFIG.get('fixtures_path', FIXTURES_PATH)}"
+    return OPENAI_MODEL
+
+def _cache_key(processed_prompt: str, dm_option: str) -> str:
+    """Cache key for a processed prompt under the current backend settings."""
+    return ResponseCache.make_key(
+        processed_prompt,
+        dm_option,
+        _model_name(dm_option),
+        DM_CONFIG.get("randomness", 0.7),
+        DM_CONFIG.get("max_tokens", 500),
+    )
+
+def _store_cached_response(key: str, dm_option: str, response: str):
+    """Stores a successful response in the cache."""
+    if response and response not in ERROR_RESPONSES:
+        get_response_cache().put(key, response, backend=dm_option, model=_model_name(dm_option))
+
+STRUCTURED_GUIDANCE = (
+    "IMPORTANT: You are the Dungeon Master in a structured TTRPG setting. "
+    "Stay within the pre-defined plotlines, avoid adding unauthorized factions, and ensure all "
+    "descriptions fit the established lore. "
+    "Follow a classic TTRPG format: Provide descriptions, ask the player for actions, and react accordingly."
+)
+
+def configure_logging():
+    """
+    Starts the background DM log writer using DM_CONFIG (safe to call repeatedly; later
+    calls only update the level). The guidance preamble is stored once per log file.
+    """
+    return configure_dm_logging(
+        DM_CONFIG.get("log_file", LOG_FILE),
+        level=DM_CONFIG.get("log_level", "INFO"),
+        max_bytes=DM_CONFIG.get("log_max_bytes", 5 * 1024 * 1024),
+        backup_count=DM_CONFIG.get("log_backup_count", 5),
+        preambles=[STRUCTURED_GUIDANCE],
+    )
+
+def _tone_prompt(prompt: str) -> str:
+    """The per-turn part of a processed prompt."""
+    tone = DM_CONFIG.get("tone", "neutral")
+    return f"[Tone: {tone}] {prompt}"
 
 def preprocess_prompt(prompt: str) -> str:
     """
     Injects structured guidance to keep AI responses within the game’s storyline.
     """
-    tone = DM_CONFIG.get("tone", "neutral")
-    structured_guidance = (
-        "IMPORTANT: You are the Dungeon Master in a structured TTRPG setting. "
-        "Stay within the pre-defined plotlines, avoid adding unauthorized factions, and ensure all "
-        "descriptions fit the established lore. "
-        "Follow a classic TTRPG format: Provide descriptions, ask the player for actions, and react accordingly."
+    return f"{STRUCTURED_GUIDANCE}\n{_tone_prompt(prompt)}"
+
+def prompt_token_budget(dm_option: str) -> int:
+    """
+    Tokens a scene prompt may use: the configured scene budget, capped by what is left of
+    the context window after the response and the guidance preamble.
+    """
+    preamble = estimate_tokens(preprocess_prompt(""), dm_option)
+    available = DM_CONFIG.get("context_tokens", 4096) - DM_CONFIG.get("max_tokens", 500) - preamble
+    return max(0, min(DM_CONFIG.get("scene_prompt_tokens", 700), available))
+
+# 🔁 Session Context Reuse
+def dm_config_fingerprint(dm_option: str) -> str:
+    """Hash of everything that shapes the guidance prefix; a change invalidates saved contexts."""
+    material = json.dumps(
+        [STRUCTURED_GUIDANCE, dm_option, _model_name(dm_option), DM_CONFIG],
+        sort_keys=True, default=str,
     )
-    return f"{structured_guidance}\n[Tone: {tone}] {prompt}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+def _uses_ollama_http(dm_option: str) -> bool:
+    backend = OLLAMA_BACKENDS.get(dm_option)
+    return backend is not None and backend.get("transport", "http") == "http"
+
+def prime_ollama_context(dm_option: str, timeout: float = None) -> list:
+    """Runs the guidance preamble through Ollama once and returns the resulting context tokens."""
+    client = get_client(DM_CONFIG.get("ollama_host", DEFAULT_OLLAMA_HOST))
+    reply = client.generate(
+        _model_name(dm_option),
+        STRUCTURED_GUIDANCE,
+        options=dict(_ollama_options(), num_predict=1),
+        keep_alive=DM_CONFIG.get("keep_alive"),
+        timeout=timeout or DM_CONFIG.get("request_timeout", 120),
+    )
+    return reply.get("context") or []
+
+class DMSession:
+    """
+    Backend state carried across the turns of one game.
+
+    For Ollama HTTP backends this holds the context tokens produced by the guidance
+    preamble, so later turns pass them back instead of re-sending (and re-prefilling)
+    the preamble text. The context is tied to a DM_CONFIG fingerprint and is discarded
+    as soon as the configuration changes. A session is shared by the game loop and the
+    scene speculator's thread, so priming and the context swap are locked.
+    """
+
+    def __init__(self, dm_option: str, context: list = None, fingerprint: str = None, session_id: str = None):
+        self.dm_option = dm_option
+        self.context = context or []
+        self.fingerprint = fingerprint
+        self.session_id = session_id or uuid.uuid4().hex  # Fair-share key in the scheduler
+        self._prime_failed = None  # (dm_option, fingerprint, monotonic time) of the last failed priming
+        self._prime_lock = threading.Lock()  # One priming at a time; other callers wait for its result
+        self._state_lock = threading.Lock()  # Keeps dm_option, context and fingerprint consistent
+
+    def prefix_context(self, dm_option: str, priority: int = PRIORITY_INTERACTIVE, deadline: float = None) -> list:
+        """
+        Returns the warm preamble context for dm_option, priming it if missing or stale.
+
+        Priming goes through the backend's circuit breaker and a scheduler slot and is bounded
+        by the turn deadline. It is skipped while the breaker is open or when no slot frees up in
+        time, and after a failure it is not tried again for DM_CONFIG['breaker_reset_seconds'];
+        turns send the full prompt meanwhile. A caller arriving while another thread primes
+        waits for that priming (up to its deadline) instead of starting a second one.
+        """
+        if not _uses_ollama_http(dm_option):
+            return []
+
+        fingerprint = dm_config_fingerprint(dm_option)
+        context = self._warm_context(dm_option, fingerprint)
+        if context:
+            return context
+        if deadline is None:
+            deadline = time.monotonic() + DM_CONFIG.get("turn_deadline", 300)
+        if not self._prime_lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            return []
+        try:
+            return self._warm_context(dm_option, fingerprint) or self._prime(dm_option, fingerprint, priority, deadline)
+        finally:
+            self._prime_lock.release()
+
+    def _warm_context(self, dm_option: str, fingerprint: str) -> list:
+        with self._state_lock:
+            if dm_option == self.dm_option and self.context and self.fingerprint == fingerprint:
+                return self.context
+        return []
+
+    def _prime(self, dm_option: str, fingerprint: str, priority: int, deadline: float) -> list:
+        if self._prime_failed and self._prime_failed[:2] == (dm_option, fingerprint) and \
+                time.monotonic() - self._prime_failed[2] < DM_CONFIG.get("breaker_reset_seconds", 30):
+            return []
 
-def send_prompt_to_dm(prompt: str, dm_option: str = 'mistral') -> str:
+        breaker = get_breaker(dm_option)
+        try:
+            with _backend_slot(dm_option, priority, self.session_id, deadline) as timeout:
+                try:
+                    context = prime_ollama_context(dm_option, timeout)
+                except (OllamaError, OSError, DMBackendError) as e:
+                    breaker.record_failure()
+                    log.error(f"⚠️ Could not prime DM context for {dm_option}: {e}")
+                    context = []
+                else:
+                    breaker.record_success()
+        except (CircuitOpenError, DMTimeoutError) as e:
+            log.warning(f"⚠️ Skipped priming DM context for {dm_option}: {e}")
+            return []
+
+        with self._state_lock:
+            self.context = context
+            self.dm_option = dm_option
+            self.fingerprint = fingerprint if context else None
+        self._prime_failed = None if context else (dm_option, fingerprint, time.monotonic())
+        return context
+
+    def to_dict(self) -> dict:
+        with self._state_lock:
+            return {"dm_option": self.dm_option, "context": self.context, "fingerprint": self.fingerprint}
+
+    @classmethod
+    def from_dict(cls, data: dict, dm_option: str):
+        """Restores a saved session, dropping its context if it no longer matches DM_CONFIG."""
+        session = cls(dm_option)
+        if data and data.get("dm_option") == dm_option and data.get("fingerprint") == dm_config_fingerprint(dm_option):
+            session.context = data.get("context") or []
+            session.fingerprint = data["fingerprint"]
+        return session
+
+def _session_prompt(prompt: str, processed_prompt: str, dm_option: str, preprocess: bool, session, priority: int,
+                    deadline: float):
+    """
+    Returns (backend_prompt, context). The processed prompt is what gets logged and cached;
+    with a warm session the backend only receives the per-turn part.
+    """
+    if not preprocess or session is None:
+        return processed_prompt, None
+    context = session.prefix_context(dm_option, priority, deadline)
+    if context:
+        return _tone_prompt(prompt), context
+    return processed_prompt, None
+
+def _session_id(session) -> str:
+    return session.session_id if session is not None else "default"
+
+def send_prompt_to_dm(prompt: str, dm_option: str = 'mistral', stream: bool = False, preprocess: bool = True,
+                      session: DMSession = None, priority: int = PRIORITY_INTERACTIVE, call_site: str = None):
     """
     Sends a prompt to the chosen AI backend and returns the response.
+
+    A failing backend is retried with jittered backoff, then the next backend in
+    DM_CONFIG['fallback_chain'] is tried; if every backend fails, a cached reply for the
+    same prompt or a canned message is returned.
     
     Parameters:
     - prompt (str): The prompt to send to the DM.
     - dm_option (str): 'openai', 'mistral', or 'deepseek' to choose the backend.
+    - stream (bool): If True, return a generator of text chunks instead (see stream_prompt_to_dm).
+    - preprocess (bool): Prepend the DM guidance block; disable for utility prompts like summaries.
+    - session (DMSession): Reuses the game's warm preamble context on Ollama HTTP backends.
+    - priority (int): Scheduling priority (PRIORITY_INTERACTIVE, PRIORITY_SUMMARY, PRIORITY_SPECULATIVE).
+    - call_site (str): Label for metrics, e.g. 'enter_location'.
     
     Returns:
     - response (str): The AI-generated DM response.
     """
-    processed_prompt = preprocess_prompt(prompt)
-    logging.info(f"🔹 Sending prompt to DM ({dm_option}): {processed_prompt}")
+    if stream:
+        return stream_prompt_to_dm(prompt, dm_option, preprocess, session, priority, call_site)
+
+    configure_logging()
 
     # Ensure a valid DM option is selected
-    if dm_option not in ["openai", "mistral", "deepseek"]:
-        logging.error(f"Invalid DM option selected: {dm_option}")
-        return "Invalid DM option selected. Please restart and choose a valid AI model."
-
-    # Route the request to the selected AI model
-    if dm_option == "openai":
-        response = send_prompt_to_openai(processed_prompt)
-    elif dm_option == "mistral":
-        response = send_prompt_to_mistral(processed_prompt)
-    elif dm_option == "deepseek":
-        response = send_prompt_to_deepseek(processed_prompt)
-
-    logging.info(f"📝 DM Response: {response}")
+    if dm_option not in DM_OPTIONS:
+        log.error(f"Invalid DM option selected: {dm_option}")
+        return INVALID_OPTION_RESPONSE
+
+    started = time.monotonic()
+    processed_prompt = preprocess_prompt(prompt) if preprocess else prompt
+    log.info(f"🔹 Sending prompt to DM ({dm_option}): {processed_prompt}")
+
+    if DM_CONFIG.get("cache_enabled"):
+        cached = get_response_cache().get(_cache_key(processed_prompt, dm_option))
+        if cached is not None:
+            log.info(f"💾 DM Response (cached): {cached}")
+            _record_metrics(dm_option, call_site, "cached", started, processed_prompt, cached)
+            return cached
+
+    deadline = time.monotonic() + DM_CONFIG.get("turn_deadline", 300)
+    backend_prompt, context = _session_prompt(prompt, processed_prompt, dm_option, preprocess, session, priority, deadline)
+    for backend in _backend_chain(dm_option):
+        # The warm session context belongs to the requested model; fallbacks get the full prompt
+        attempt_prompt, attempt_context = (backend_prompt, context) if backend == dm_option else (processed_prompt, None)
+        try:
+            response = _call_with_resilience(backend, attempt_prompt, attempt_context, priority, session, deadline)
+        except DMBackendError as e:
+            log.error(f"⚠️ DM backend '{backend}' failed: {e}")
+            continue
+
+        if DM_CONFIG.get("cache_enabled"):
+            _store_cached_response(_cache_key(processed_prompt, backend), backend, response)
+        log.info(f"📝 DM Response ({backend}): {response}")
+        outcome = "ok" if backend == dm_option else "fallback"
+        _record_metrics(backend, call_site, outcome, started, processed_prompt, response)
+        _record_fixture(processed_prompt, backend, response)
+        return response
+
+    response = _last_resort_response(processed_prompt, dm_option)
+    log.warning(f"🛟 All DM backends failed, using fallback reply: {response}")
+    _record_metrics(dm_option, call_site, "failed", started, processed_prompt, response)
     return response
 
-def send_prompt_to_openai(prompt: str) -> str:
+def stream_prompt_to_dm(prompt: str, dm_option: str = 'mistral', preprocess: bool = True, session: DMSession = None,
+                        priority: int = PRIORITY_INTERACTIVE, call_site: str = None):
+    """
+    Sends a prompt to the chosen AI backend and yields the response in chunks as it is generated.
+    Closing the generator cancels the in-flight generation and frees the backend.
+    Retries and fallbacks apply until the first chunk arrives; a stream that breaks
+    midway simply ends, since its text has already been shown.
+    """
+    configure_logging()
+    if dm_option not in DM_OPTIONS:
+        log.error(f"Invalid DM option selected: {dm_option}")
+        yield INVALID_OPTION_RESPONSE
+        return
+
+    started = time.monotonic()
+    processed_prompt = preprocess_prompt(prompt) if preprocess else prompt
+    log.info(f"🔹 Streaming prompt to DM ({dm_option}): {processed_prompt}")
+
+    if DM_CONFIG.get("cache_enabled"):
+        cached = get_response_cache().get(_cache_key(processed_prompt, dm_option))
+        if cached is not None:
+            log.info(f"💾 DM Response (cached): {cached}")
+            _record_metrics(dm_option, call_site, "cached", started, processed_prompt, cached)
+            yield cached
+            return
+
+    deadline = time.monotonic() + DM_CONFIG.get("turn_deadline", 300)
+    backend_prompt, context = _session_prompt(prompt, processed_prompt, dm_option, preprocess, session, priority, deadline)
+    for backend in _backend_chain(dm_option):
+        attempt_prompt, attempt_context = (backend_prompt, context) if backend == dm_option else (processed_prompt, None)
+        try:
+            stack, chunks, first = _open_stream_with_resilience(
+                backend, attempt_prompt, attempt_context, priority, session, deadline
+            )
+        except DMBackendError as e:
+            log.error(f"⚠️ DM backend '{backend}' failed: {e}")
+            continue
+
+        first_token_at = time.monotonic()
+        received = []
+        outcome = "cancelled"
+        with stack:  # Closes the backend stream and releases the scheduler slot
+            try:
+                if first:
+                    received.append(first)
+                    yield first
+                for chunk in chunks:
+                    received.append(chunk)
+                    yield chunk
+                outcome = "ok" if backend == dm_option else "fallback"
+            except DMBackendError as e:
+                get_breaker(backend).record_failure()
+                outcome = "failed"
+                log.error(f"⚠️ DM backend '{backend}' failed mid-stream: {e}")
+            finally:
+                response = "".join(received).strip()
+                if outcome in ("ok", "fallback"):
+                    if DM_CONFIG.get("cache_enabled"):
+                        _store_cached_response(_cache_key(processed_prompt, backend), backend, response)
+                    log.info(f"📝 DM Response ({backend}): {response}")
+                    _record_fixture(processed_prompt, backend, response)
+                else:
+                    log.info(f"⏹️ DM Response {outcome} after {len(response)} characters: {response}")
+                _record_metrics(backend, call_site, outcome, started, processed_prompt, response, first_token_at)
+        return
+
+    response = _last_resort_response(processed_prompt, dm_option)
+    log.warning(f"🛟 All DM backends failed, using fallback reply: {response}")
+    _record_metrics(dm_option, call_site, "failed", started, processed_prompt, response)
+    yield response
+
+# 📊 Metrics
+METRICS = DMMetrics()
+
+def _record_metrics(backend: str, call_site: str, outcome: str, started: float, processed_prompt: str,
+                    response: str, first_token_at: float = None):
+    finished = time.monotonic()
+    METRICS.record_call(
+        backend,
+        call_site,
+        outcome,
+        wall_seconds=finished - started,
+        ttft_seconds=(first_token_at or finished) - started,
+        prompt_tokens=estimate_tokens(processed_prompt, backend),
+        output_tokens=estimate_tokens(response, backend),
+    )
+
+def metrics_snapshot() -> dict:
+    """Returns call counts and p50/p95/p99 latency, size and throughput per backend and call site."""
+    return METRICS.snapshot()
+
+def export_metrics(fmt: str = "json", path: str = None) -> str:
     """
-    Sends a prompt to OpenAI's ChatGPT API.
+    Renders the DM metrics as 'json' or 'prometheus' text, optionally writing them to path.
+    """
+    text = METRICS.to_prometheus() if fmt == "prometheus" else METRICS.to_json()
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return text
+
+# 🛡️ Timeouts, Retries, Circuit Breakers & Fallbacks
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    """Returns the circuit breaker guarding a backend."""
+    with _BREAKERS_LOCK:
+        if backend not in _BREAKERS:
+            _BREAKERS[backend] = CircuitBreaker(
+                failure_threshold=DM_CONFIG.get("breaker_failure_threshold", 3),
+                reset_timeout=DM_CONFIG.get("breaker_reset_seconds", 30),
+            )
+        return _BREAKERS[backend]
+
+def backend_health() -> dict:
+    """Returns the circuit breaker state of every backend used so far."""
+    with _BREAKERS_LOCK:
+        return {backend: {"state": breaker.state, "failures": breaker.failures} for backend, breaker in _BREAKERS.items()}
+
+def _backend_chain(dm_option: str) -> list:
+    """The requested backend followed by its configured fallbacks."""
+    chain = [dm_option]
+    for backend in DM_CONFIG.get("fallback_chain", {}).get(dm_option, []):
+        if backend in DM_OPTIONS and backend not in chain:
+            chain.append(backend)
+    return chain
+
+def _attempt_timeout(deadline: float) -> float:
+    """Per-attempt timeout: the configured request timeout, cut short by the overall deadline."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DMTimeoutError("Turn deadline exceeded")
+    return min(DM_CONFIG.get("request_timeout", 120), remaining)
+
+def _retry_settings(deadline: float) -> dict:
+    return {
+        "retries": DM_CONFIG.get("max_retries", 2),
+        "base_delay": DM_CONFIG.get("retry_base_delay", 0.5),
+        "max_delay": DM_CONFIG.get("retry_max_delay", 4.0),
+        "deadline": deadline,
+    }
+
+def _call_backend(backend: str, prompt: str, context: list, timeout: float) -> str:
+    if backend in ("mock", "replay"):
+        return get_offline_backend(backend).generate(prompt, timeout=timeout)
+    if backend == "openai":
+        return send_prompt_to_openai(prompt, timeout=timeout)
+    if backend == "mistral":
+        return send_prompt_to_mistral(prompt, context=context, timeout=timeout)
+    return send_prompt_to_deepseek(prompt, context=context, timeout=timeout)
+
+def _stream_backend(backend: str, prompt: str, context: list, timeout: float):
+    if backend in ("mock", "replay"):
+        return get_offline_backend(backend).stream(prompt, timeout=timeout)
+    if backend == "openai":
+        return stream_prompt_to_openai(prompt, timeout=timeout)
+    if backend == "mistral":
+        return stream_prompt_to_mistral(prompt, context=context, timeout=timeout)
+    return stream_prompt_to_deepseek(prompt, context=context, timeout=timeout)
+
+@contextlib.contextmanager
+def _backend_slot(backend: str, priority: int, session_id: str, deadline: float):
+    """
+    Holds a scheduler slot for one backend attempt and yields the attempt's timeout.
+
+    The breaker is consulted only once the slot is granted, so time spent queued (and a
+    deadline that runs out there, raising DMTimeoutError) is never recorded as a backend
+    failure and never ties up a half-open breaker's trial call.
+    """
+    breaker = get_breaker(backend)
+    if breaker.state == "open":
+        raise CircuitOpenError(f"Circuit open for '{backend}'")
+    with SCHEDULER.slot(backend, priority, session_id, deadline):
+        timeout = _attempt_timeout(deadline)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for '{backend}'")
+        yield timeout
+
+def _call_with_resilience(backend: str, prompt: str, context: list, priority: int, session, deadline: float) -> str:
+    """Calls a backend through its circuit breaker and the scheduler, retrying failures."""
+    breaker = get_breaker(backend)
+
+    def attempt():
+        with _backend_slot(backend, priority, _session_id(session), deadline) as timeout:
+            try:
+                response = _call_backend(backend, prompt, context, timeout)
+            except FixtureMissing:
+                breaker.record_success()  # The backend answered; it just has nothing recorded
+                raise
+            except DMBackendError:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            return response
+
+    return call_with_retries(attempt, **_retry_settings(deadline))
+
+def _open_stream_with_resilience(backend: str, prompt: str, context: list, priority: int, session, deadline: float):
+    """
+    Opens a backend stream and waits for its first chunk, retrying failures.
+    Returns (exit_stack, chunks, first_chunk); closing the stack ends the stream and frees the slot.
+    """
+    breaker = get_breaker(backend)
+
+    def attempt():
+        stack = contextlib.ExitStack()
+        timeout = stack.enter_context(_backend_slot(backend, priority, _session_id(session), deadline))
+        try:
+            chunks = _stream_backend(backend, prompt, context, timeout)
+            stack.callback(chunks.close)
+            first = next(chunks, "")
+        except FixtureMissing:
+            stack.close()
+            breaker.record_success()  # The backend answered; it just has nothing recorded
+            raise
+        except DMBackendError:
+            stack.close()
+            breaker.record_failure()
+            raise
+        except BaseException:
+            stack.close()
+            raise
+        breaker.record_success()
+        return stack, chunks, first
+
+    return call_with_retries(attempt, **_retry_settings(deadline))
+
+def _last_resort_response(processed_prompt: str, dm_option: str) -> str:
+    """A previously cached reply for this prompt from any backend in the chain, else a canned message."""
+    cache = get_response_cache()
+    for backend in _backend_chain(dm_option):
+        cached = cache.get(_cache_key(processed_prompt, backend))
+        if cached is not None:
+            return cached
+    return BACKEND_ERROR_RESPONSES.get(dm_option, MISTRAL_ERROR_RESPONSE)
+
+# 📼 Offline Backends (mock and record/replay)
+_fixtures = None
+
+def get_fixtures() -> DMFixtures:
+    """Returns the shared fixture store for DM_CONFIG['fixtures_path']."""
+    global _fixtures
+    if _fixtures is None or _fixtures.path != DM_CONFIG.get("fixtures_path", FIXTURES_PATH):
+        _fixtures = DMFixtures(DM_CONFIG.get("fixtures_path", FIXTURES_PATH))
+    return _fixtures
+
+def get_offline_backend(dm_option: str):
+    """Builds the "mock" or "replay" backend from the current DM_CONFIG."""
+    if dm_option == "replay":
+        return ReplayDMBackend(get_fixtures(), DM_CONFIG.get("replay_profile", "instant"))
+    return MockDMBackend(DM_CONFIG.get("mock_profile", "local_7b"), DM_CONFIG.get("mock_seed", 0))
+
+def _record_fixture(processed_prompt: str, backend: str, response: str):
+    """Captures a successful real reply when DM_CONFIG['record_fixtures'] is on."""
+    if DM_CONFIG.get("record_fixtures") and backend != "replay" and response and response not in ERROR_RESPONSES:
+        try:
+            get_fixtures().record(processed_prompt, response, backend)
+        except OSError as e:
+            log.error(f"⚠️ Could not record DM fixture: {e}")
+
+def send_prompt_to_openai(prompt: str, timeout: float = None) -> str:
+    """
+    Sends a prompt to OpenAI's ChatGPT API. Raises DMBackendError on failure.
     """
     openai.api_key = os.getenv('OPENAI_API_KEY')
     try:
         response = openai.Completion.create(
-            engine="gpt-4",
+            engine=OPENAI_MODEL,
             prompt=prompt,
             max_tokens=DM_CONFIG.get("max_tokens", 500),
             n=1,
             stop=None,
             temperature=DM_CONFIG.get("randomness", 0.7),
+            request_timeout=timeout or DM_CONFIG.get("request_timeout", 120),
         )
         return response.choices[0].text.strip()
     except Exception as e:
-        logging.error(f"⚠️ Error communicating with OpenAI: {e}")
-        return "An error occurred while communicating with the OpenAI DM."
+        log.error(f"⚠️ Error communicating with OpenAI: {e}")
+        raise DMBackendError(f"OpenAI: {e}") from e
 
-def send_prompt_to_mistral(prompt: str, model_name="mistral:latest") -> str:
+def stream_prompt_to_openai(prompt: str, timeout: float = None):
     """
-    Sends a prompt to Mistral running locally via Ollama Run and returns the response.
+    Streams a completion from OpenAI's ChatGPT API, yielding text chunks. Raises DMBackendError on failure.
     """
+    openai.api_key = os.getenv('OPENAI_API_KEY')
     try:
-        logging.info(f"Running: ollama run {model_name} \"{prompt}\"")
-        
+        response = openai.Completion.create(
+            engine=OPENAI_MODEL,
+            prompt=prompt,
+            max_tokens=DM_CONFIG.get("max_tokens", 500),
+            n=1,
+            stop=None,
+            temperature=DM_CONFIG.get("randomness", 0.7),
+            stream=True,
+            request_timeout=timeout or DM_CONFIG.get("request_timeout", 120),
+        )
+        for event in response:
+            text = event.choices[0].text
+            if text:
+                yield text
+    except Exception as e:
+        log.error(f"⚠️ Error communicating with OpenAI: {e}")
+        raise DMBackendError(f"OpenAI: {e}") from e
+
+def _ollama_options() -> dict:
+    """Sampling options sent with every Ollama HTTP request."""
+    return {
+        "temperature": DM_CONFIG.get("randomness", 0.7),
+        "num_predict": DM_CONFIG.get("max_tokens", 500),
+    }
+
+def send_prompt_to_ollama(prompt: str, dm_option: str, model_name: str = None, context: list = None,
+                          timeout: float = None) -> str:
+    """
+    Sends a prompt to an Ollama-hosted model using the transport configured in OLLAMA_BACKENDS.
+    `context` (HTTP only) continues from previously returned context tokens.
+    Raises OllamaError, OSError or subprocess.SubprocessError on failure.
+    """
+    backend = OLLAMA_BACKENDS[dm_option]
+    model_name = model_name or backend["model"]
+    timeout = timeout or DM_CONFIG.get("request_timeout", 120)
+
+    if backend.get("transport", "http") == "cli":
+        log.info(f"Running: ollama run {model_name} \"{prompt}\"")
         result = subprocess.run(
             ["ollama", "run", model_name, prompt],
             capture_output=True,
             text=True,
             encoding="utf-8",  # ✅ Fixes UnicodeDecodeError
-            check=True
+            check=True,
+            timeout=timeout,
         )
         return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Error communicating with Mistral via Ollama Run: {e}, Output: {e.output}")
-        print("Error communicating with Mistral via Ollama Run:", e)
-        print("Output:", e.output)
-        return "An error occurred while communicating with the local AI."
 
-def send_prompt_to_deepseek(prompt: str) -> str:
+    client = get_client(DM_CONFIG.get("ollama_host", DEFAULT_OLLAMA_HOST))
+    extra = {"context": context} if context else {}
+    reply = client.generate(
+        model_name,
+        prompt,
+        options=_ollama_options(),
+        keep_alive=DM_CONFIG.get("keep_alive"),
+        timeout=timeout,
+        **extra
+    )
+    return reply.get("response", "").strip()
+
+def stream_prompt_to_ollama(prompt: str, dm_option: str, model_name: str = None, context: list = None,
+                            timeout: float = None):
+    """
+    Streams a completion from an Ollama-hosted model, yielding text chunks as they arrive.
+    Raises OllamaError, OSError or subprocess.SubprocessError on failure.
+    """
+    backend = OLLAMA_BACKENDS[dm_option]
+    model_name = model_name or backend["model"]
+    timeout = timeout or DM_CONFIG.get("request_timeout", 120)
+
+    if backend.get("transport", "http") == "cli":
+        log.info(f"Streaming: ollama run {model_name} \"{prompt}\"")
+        command = ["ollama", "run", model_name, prompt]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            while True:
+                data = process.stdout.read1(4096)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    yield text
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            if process.wait() != 0:
+                if timed_out.is_set():
+                    raise subprocess.TimeoutExpired(command, timeout)
+                raise subprocess.CalledProcessError(process.returncode, command, output=process.stderr.read())
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                process.terminate()  # Cancelled mid-stream: stop the model run
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+        return
+
+    client = get_client(DM_CONFIG.get("ollama_host", DEFAULT_OLLAMA_HOST))
+    extra = {"context": context} if context else {}
+    messages = client.stream_generate(
+        model_name,
+        prompt,
+        options=_ollama_options(),
+        keep_alive=DM_CONFIG.get("keep_alive"),
+        timeout=timeout,
+        **extra
+    )
+    try:
+        for message in messages:
+            if message.get("response"):
+                yield message["response"]
+    finally:
+        messages.close()
+
+def _ollama_failure(label: str, error: Exception) -> DMBackendError:
+    """Logs an Ollama failure and wraps it in the matching DMBackendError."""
+    if isinstance(error, subprocess.CalledProcessError):
+        log.error(f"⚠️ Error communicating with {label} via Ollama Run: {error}, Output: {error.output}")
+    else:
+        log.error(f"⚠️ Error communicating with {label} via Ollama: {error}")
+    if isinstance(error, (subprocess.TimeoutExpired, socket.timeout)):
+        return DMTimeoutError(f"{label}: {error}")
+    return DMBackendError(f"{label}: {error}")
+
+def send_prompt_to_mistral(prompt: str, model_name: str = None, context: list = None, timeout: float = None) -> str:
+    """
+    Sends a prompt to Mistral running locally via Ollama and returns the response.
+    Raises DMBackendError on failure.
+    """
+    try:
+        return send_prompt_to_ollama(prompt, "mistral", model_name, context, timeout)
+    except (subprocess.SubprocessError, OllamaError, OSError) as e:
+        raise _ollama_failure("Mistral", e) from e
+
+def send_prompt_to_deepseek(prompt: str, model_name: str = None, context: list = None, timeout: float = None) -> str:
     """
     Sends a prompt to DeepSeek Chat running locally via Ollama.
+    Raises DMBackendError on failure.
     """
     try:
-        model_name = "deepseek-r1:latest"
-        logging.info(f"🔹 Running: ollama run {model_name} \"{prompt}\"")
+        return send_prompt_to_ollama(prompt, "deepseek", model_name, context, timeout)
+    except (subprocess.SubprocessError, OllamaError, OSError) as e:
+        raise _ollama_failure("DeepSeek", e) from e
 
-        result = subprocess.run(
-            ["ollama", "run", model_name, prompt],
-            capture_output=True,
-            text=True,
-            check=True
+def stream_prompt_to_mistral(prompt: str, model_name: str = None, context: list = None, timeout: float = None):
+    """
+    Streams a response from Mistral running locally via Ollama. Raises DMBackendError on failure.
+    """
+    try:
+        yield from stream_prompt_to_ollama(prompt, "mistral", model_name, context, timeout)
+    except (subprocess.SubprocessError, OllamaError, OSError) as e:
+        raise _ollama_failure("Mistral", e) from e
+
+def stream_prompt_to_deepseek(prompt: str, model_name: str = None, context: list = None, timeout: float = None):
+    """
+    Streams a response from DeepSeek Chat running locally via Ollama. Raises DMBackendError on failure.
+    """
+    try:
+        yield from stream_prompt_to_ollama(prompt, "deepseek", model_name, context, timeout)
+    except (subprocess.SubprocessError, OllamaError, OSError) as e:
+        raise _ollama_failure("DeepSeek", e) from e
+
+def render_dm_stream(chunks) -> str:
+    """
+    Prints DM response chunks as they arrive and returns the full text.
+    Ctrl-C cancels the in-flight generation and keeps whatever was already shown.
+    """
+    print("\n📝 [DM]: ", end="", flush=True)
+    received = []
+    try:
+        for chunk in chunks:
+            if not received:
+                chunk = chunk.lstrip()  # Models often open with whitespace
+                if not chunk:
+                    continue
+            received.append(chunk)
+            print(chunk, end="", flush=True)
+        print()
+    except KeyboardInterrupt:
+        chunks.close()
+        print("\n⏹️ Generation cancelled.")
+    return "".join(received).strip()
+
+def dm_turn(prompt: str, dm_option: str = "mistral", session: DMSession = None, call_site: str = None,
+            guard=None) -> str:
+    """
+    Runs one DM turn, streaming it to the terminal when DM_CONFIG['stream'] is enabled.
+    With a LoreGuard, the reply is checked for unknown names as it streams (see check_lore).
+    """
+    if DM_CONFIG.get("lore_guard", "warn") == "off":
+        guard = None
+
+    if DM_CONFIG.get("stream", True):
+        chunks = send_prompt_to_dm(prompt, dm_option, stream=True, session=session, call_site=call_site)
+        if guard is None:
+            return render_dm_stream(chunks)
+        scan = guard.stream(prompt)
+        response = render_dm_stream(scan.wrap(chunks))
+        return check_lore(prompt, response, scan.finish(), dm_option, session)
+
+    response = send_prompt_to_dm(prompt, dm_option, session=session, call_site=call_site)
+    print(f"\n📝 [DM]: {response}")
+    if guard is None:
+        return response
+    return check_lore(prompt, response, guard.scan(response, prompt), dm_option, session)
+
+def check_lore(prompt: str, response: str, unknown: list, dm_option: str, session: DMSession = None) -> str:
+    """
+    Reports names the lore guard did not recognize. In "regenerate" mode the DM is asked
+    once to rewrite the reply without them, and the rewrite replaces the original.
+    """
+    if not unknown or response in ERROR_RESPONSES:
+        return response
+    log.warning(f"🛡️ Lore guard: unknown names in DM response: {', '.join(unknown)}")
+    if DM_CONFIG.get("lore_guard", "warn") != "regenerate":
+        return response
+
+    print(f"\n🛡️ Lore check: {', '.join(unknown)} not in established lore. Revising...")
+    retry_prompt = (
+        f"{prompt}\n\n"
+        f"Your previous reply introduced names that are not part of the established setting: {', '.join(unknown)}.\n"
+        "Rewrite the reply without them, using only the characters, factions and locations given above."
+    )
+    return dm_turn(retry_prompt, dm_option, session, call_site="lore_regeneration")
+
+# ⚡ Asyncio Interface
+async def _run_in_thread(func, *args, **kwargs):
+    """Runs a blocking DM call on the event loop's default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+async def async_send_prompt_to_dm(prompt: str, dm_option: str = 'mistral', priority: int = PRIORITY_INTERACTIVE,
+                                  call_site: str = None) -> str:
+    """Async variant of send_prompt_to_dm; the blocking backend call runs in a worker thread."""
+    return await _run_in_thread(send_prompt_to_dm, prompt, dm_option, priority=priority, call_site=call_site)
+
+async def async_stream_prompt_to_dm(prompt: str, dm_option: str = 'mistral', preprocess: bool = True,
+                                    session: DMSession = None, priority: int = PRIORITY_INTERACTIVE,
+                                    call_site: str = None):
+    """
+    Async iterator over DM response chunks (see stream_prompt_to_dm for the parameters).
+
+    The blocking stream runs on its own worker thread and hands chunks over through a queue.
+    When the consumer stops or is cancelled, the worker closes the stream after the chunk it
+    is waiting on, which cancels the generation and frees the scheduler slot.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+    stop = threading.Event()
+    finished = object()
+
+    def hand_over(item):
+        try:
+            loop.call_soon_threadsafe(chunks.put_nowait, item)
+        except RuntimeError:  # Event loop already closed
+            stop.set()
+
+    def pump():
+        stream = stream_prompt_to_dm(prompt, dm_option, preprocess, session, priority, call_site)
+        try:
+            for chunk in stream:
+                if stop.is_set():
+                    break
+                hand_over(chunk)
+        except Exception as e:
+            hand_over(e)
+        finally:
+            stream.close()
+            hand_over(finished)
+
+    threading.Thread(target=pump, name="dm-async-stream", daemon=True).start()
+    try:
+        while True:
+            chunk = await chunks.get()
+            if chunk is finished:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        stop.set()
+
+async def async_send_prompt_to_openai(prompt: str) -> str:
+    """Async variant of send_prompt_to_openai."""
+    return await _run_in_thread(send_prompt_to_openai, prompt)
+
+async def async_send_prompt_to_mistral(prompt: str, model_name: str = None, context: list = None) -> str:
+    """Async variant of send_prompt_to_mistral."""
+    return await _run_in_thread(send_prompt_to_mistral, prompt, model_name, context)
+
+async def async_send_prompt_to_deepseek(prompt: str, model_name: str = None, context: list = None) -> str:
+    """Async variant of send_prompt_to_deepseek."""
+    return await _run_in_thread(send_prompt_to_deepseek, prompt, model_name, context)
+
+async def gather_prompts(prompts, dm_option: str = 'mistral', concurrency: int = None,
+                         priority: int = PRIORITY_INTERACTIVE, call_site: str = None) -> list:
+    """
+    Sends independent prompts concurrently and returns their responses in the same order.
+
+    Parameters:
+    - prompts (list[str]): Prompts that do not depend on each other's output.
+    - dm_option (str): The selected AI backend.
+    - concurrency (int): Maximum prompts in flight at once (default: DM_CONFIG['max_concurrent_prompts']).
+    - priority (int): Scheduling priority for every prompt in the batch.
+    - call_site (str): Metrics label for every prompt in the batch.
+    """
+    limit = max(1, concurrency or DM_CONFIG.get("max_concurrent_prompts", 2))
+    semaphore = asyncio.Semaphore(limit)
+
+    async def dispatch(prompt):
+        async with semaphore:
+            return await async_send_prompt_to_dm(prompt, dm_option, priority, call_site)
+
+    return await asyncio.gather(*(dispatch(prompt) for prompt in prompts))
+
+def send_prompts_concurrently(prompts, dm_option: str = 'mistral', concurrency: int = None,
+                              priority: int = PRIORITY_INTERACTIVE, call_site: str = None) -> list:
+    """Blocking wrapper around gather_prompts for synchronous callers."""
+    return asyncio.run(gather_prompts(prompts, dm_option, concurrency, priority, call_site))
+
+def _memory_summarizer(dm_option: str):
+    """Builds the summarize callback for ConversationMemory; failures return '' so turns stay pending."""
+    def summarize(summary_prompt: str) -> str:
+        response = send_prompt_to_dm(
+            summary_prompt, dm_option, preprocess=False, priority=PRIORITY_SUMMARY, call_site="memory_summary"
         )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        logging.error(f"⚠️ Error communicating with DeepSeek: {e}, Output: {e.output}")
-        return "An error occurred while communicating with the local DeepSeek DM."
+        return "" if response in ERROR_RESPONSES else response
+    return summarize
 
 # ✅ **NEW: Interactive Story Session**
-def interactive_story_session(initial_prompt: str, dm_option="mistral"):
+def interactive_story_session(initial_prompt: str, dm_option="mistral", session: DMSession = None,
+                              initial_response: str = None, on_turn=None, call_site: str = None, lore=None,
+                              guard=None):
     """
     Allows back-and-forth interaction between the user and the DM to progress through the story.
     
     Parameters:
     - initial_prompt (str): The opening narrative provided by the DM.
     - dm_option (str): The selected AI backend for responses.
+    - session (DMSession): Backend state reused across turns (a fresh one is made if omitted).
+    - initial_response (str): A pre-generated opening to show instead of calling the DM.
+    - on_turn (callable): Called after each DM response is shown, while the player reads it.
+    - call_site (str): Metrics label for the opening prompt; later turns are 'interactive_turn'.
+    - lore (LoreIndex): When given, lore relevant to each player action is attached to its prompt.
+    - guard (LoreGuard): When given, DM replies are checked for names outside the known world.
     """
+    configure_logging()
+    session = session or DMSession(dm_option)
     print("\n🎭 **Starting Interactive Story Session...** 🎭")
     print("Type 'exit' anytime to end the session.")
 
-    response = send_prompt_to_dm(initial_prompt, dm_option)
-    print(f"\n📝 [DM]: {response}")
+    # Recent turns go into each prompt verbatim; older ones are summarized in the background
+    memory = ConversationMemory(
+        _memory_summarizer(dm_option),
+        max_turns=DM_CONFIG.get("memory_turns", 6),
+        token_budget=DM_CONFIG.get("memory_token_budget", 1500),
+        backend=dm_option,
+    )
+
+    if initial_response:
+        log.info(f"⚡ DM Response (pre-generated): {initial_response}")
+        print(f"\n📝 [DM]: {initial_response}")
+        response = initial_response
+        if guard is not None and DM_CONFIG.get("lore_guard", "warn") != "off":
+            response = check_lore(initial_prompt, response, guard.scan(response, initial_prompt), dm_option, session)
+    else:
+        response = dm_turn(initial_prompt, dm_option, session, call_site, guard)
+    memory.add_turn(initial_prompt, response, speaker="Scene")
+    if on_turn:
+        on_turn()
 
     while True:
         player_input = input("\n🎮 Your action: ").strip()
@@ -150,8 +1071,12 @@ def interactive_story_session(initial_prompt: str, dm_option="mistral"):
 
         # Continue the story based on player actions
         new_prompt = f"Player chose: {player_input}\n\nContinue the story based on their action."
-        response = send_prompt_to_dm(new_prompt, dm_option)
-        print(f"\n📝 [DM]: {response}")
+        if lore is not None:
+            new_prompt = lore.attach(new_prompt, query=player_input)
+        response = dm_turn(memory.build_prompt(new_prompt), dm_option, session, "interactive_turn", guard)
+        memory.add_turn(player_input, response)
+        if on_turn:
+            on_turn()
 
 # ✅ Testing Script
 if __name__ == "__main__":
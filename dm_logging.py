@@ -0,0 +1,110 @@
+import atexit
+import gzip
+import hashlib
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+
+LOGGER_NAME = "dm_interface"
+LOG_FORMAT = "%(asctime)s %(levelname)s: %(message)s"
+
+def _gzip_rotator(source: str, dest: str):
+    """Compresses a rotated log file."""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+class PreambleDedupHandler(logging.handlers.RotatingFileHandler):
+    """
+    Size-rotating, gzip-compressing file handler that stores repeated prompt preambles once.
+
+    Registered preamble text is replaced by a short `⟨preamble:<hash>⟩` reference; the full
+    text is written once per log file, the first time the hash appears after a rotation.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, preambles=()):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = _gzip_rotator
+        self.preambles = {}
+        self._written = set()
+        for text in preambles:
+            self.register_preamble(text)
+
+    def register_preamble(self, text: str):
+        self.preambles[text] = hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+
+    def doRollover(self):
+        super().doRollover()
+        self._written.clear()  # The new file needs its own preamble definitions
+
+    def format(self, record) -> str:
+        message = super().format(record)
+        definitions = []
+        for text, digest in self.preambles.items():
+            if text in message:
+                message = message.replace(text, f"⟨preamble:{digest}⟩")
+                if digest not in self._written:
+                    definitions.append(f"⟨preamble:{digest}⟩ = {text}")
+        if definitions:
+            return "\n".join(definitions + [message])
+        return message
+
+    def emit(self, record):
+        super().emit(record)
+        # Only mark definitions as written once the record is actually in the (possibly new) file
+        message = record.getMessage()
+        for text, digest in self.preambles.items():
+            if text in message:
+                self._written.add(digest)
+
+_listener = None
+_file_handler = None
+_lock = threading.Lock()
+
+def configure_dm_logging(log_file: str, level="INFO", max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5,
+                         preambles=()) -> logging.Logger:
+    """
+    Sets up the DM logger once. Callers only enqueue records; a background listener thread
+    formats them, dedupes preambles and writes to a rotating, compressed log file.
+    """
+    global _listener, _file_handler
+    logger = logging.getLogger(LOGGER_NAME)
+    with _lock:
+        logger.setLevel(level)
+        if _listener is not None:
+            for text in preambles:
+                _file_handler.register_preamble(text)
+            return logger
+
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+        _file_handler = PreambleDedupHandler(log_file, max_bytes, backup_count, preambles)
+        _file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, _file_handler)
+        _listener.start()
+        atexit.register(shutdown_dm_logging)
+
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        logger.propagate = False  # Keep DM transcripts out of the root logger
+        return logger
+
+def shutdown_dm_logging():
+    """Flushes queued records to disk and stops the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            _file_handler.close()
+            logger = logging.getLogger(LOGGER_NAME)
+            for handler in list(logger.handlers):
+                if isinstance(handler, logging.handlers.QueueHandler):
+                    logger.removeHandler(handler)
@@ -0,0 +1,137 @@
+import bisect
+import json
+import threading
+from collections import deque
+
+# Upper bounds for histogram buckets, per metric
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300]
+TOKEN_BUCKETS = [16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192]
+RATE_BUCKETS = [1, 2, 5, 10, 20, 40, 80, 160]
+
+METRIC_BUCKETS = {
+    "wall_seconds": LATENCY_BUCKETS,
+    "ttft_seconds": LATENCY_BUCKETS,
+    "prompt_tokens": TOKEN_BUCKETS,
+    "output_tokens": TOKEN_BUCKETS,
+    "tokens_per_second": RATE_BUCKETS,
+}
+
+class Histogram:
+    """
+    Cumulative bucket counts (for Prometheus export) plus a bounded window of recent samples
+    (for p50/p95/p99), so memory stays fixed however many calls are recorded.
+    """
+
+    def __init__(self, buckets, window: int = 2048):
+        self.buckets = list(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+class DMMetrics:
+    """Per-call latency and throughput metrics for DM requests, keyed by backend and call site."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (metric, backend, call_site) -> Histogram
+        self._calls = {}       # (backend, call_site, outcome) -> count
+
+    def _observe(self, metric: str, backend: str, call_site: str, value: float):
+        key = (metric, backend, call_site)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(METRIC_BUCKETS[metric])
+        histogram.observe(value)
+
+    def record_call(self, backend: str, call_site: str, outcome: str, wall_seconds: float, ttft_seconds: float = None,
+                    prompt_tokens: int = 0, output_tokens: int = 0):
+        """
+        Records one DM call.
+
+        Parameters:
+        - outcome (str): 'ok', 'cached', 'fallback', 'failed' or 'cancelled'.
+        - ttft_seconds (float): Time to first token; equals wall time for non-streaming calls.
+        """
+        call_site = call_site or "unknown"
+        with self._lock:
+            key = (backend, call_site, outcome)
+            self._calls[key] = self._calls.get(key, 0) + 1
+            self._observe("wall_seconds", backend, call_site, wall_seconds)
+            if ttft_seconds is not None:
+                self._observe("ttft_seconds", backend, call_site, ttft_seconds)
+            self._observe("prompt_tokens", backend, call_site, prompt_tokens)
+            if outcome in ("ok", "fallback", "cancelled"):
+                self._observe("output_tokens", backend, call_site, output_tokens)
+                # Streaming calls measure generation after the first token; others over the whole call
+                if ttft_seconds is not None and ttft_seconds < wall_seconds:
+                    generation_time = wall_seconds - ttft_seconds
+                else:
+                    generation_time = wall_seconds
+                if output_tokens and generation_time > 0:
+                    self._observe("tokens_per_second", backend, call_site, output_tokens / generation_time)
+
+    def snapshot(self) -> dict:
+        """Returns a JSON-serializable view of every counter and histogram."""
+        with self._lock:
+            calls = [
+                {"backend": backend, "call_site": site, "outcome": outcome, "count": count}
+                for (backend, site, outcome), count in sorted(self._calls.items())
+            ]
+            histograms = [
+                dict(metric=metric, backend=backend, call_site=site, **histogram.summary())
+                for (metric, backend, site), histogram in sorted(self._histograms.items())
+            ]
+        return {"calls": calls, "histograms": histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=4)
+
+    def to_prometheus(self) -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+        lines = ["# TYPE dm_calls_total counter"]
+        with self._lock:
+            for (backend, site, outcome), count in sorted(self._calls.items()):
+                lines.append(f'dm_calls_total{{backend="{backend}",call_site="{site}",outcome="{outcome}"}} {count}')
+
+            for metric in METRIC_BUCKETS:
+                series = [(key, h) for key, h in sorted(self._histograms.items()) if key[0] == metric]
+                if not series:
+                    continue
+                lines.append(f"# TYPE dm_{metric} histogram")
+                for (_, backend, site), histogram in series:
+                    labels = f'backend="{backend}",call_site="{site}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ["+Inf"], histogram.bucket_counts):
+                        cumulative += count
+                        lines.append(f'dm_{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f"dm_{metric}_sum{{{labels}}} {histogram.total}")
+                    lines.append(f"dm_{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._calls.clear()
@@ -0,0 +1,95 @@
+import random
+import threading
+import time
+
+class DMBackendError(Exception):
+    """Raised when a DM backend fails to produce a response."""
+
+class DMTimeoutError(DMBackendError):
+    """Raised when a DM backend does not answer within its deadline."""
+
+class CircuitOpenError(DMBackendError):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+class FixtureMissing(DMBackendError):
+    """
+    Raised by the replay backend for a prompt it has no recording of. The backend is
+    healthy, so this is neither retried nor counted as a circuit breaker failure.
+    """
+
+class CircuitBreaker:
+    """
+    Stops calling a backend after `failure_threshold` consecutive failures.
+
+    While open, calls are refused for `reset_timeout` seconds. After that a single trial
+    call is let through (half-open): success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Returns True if a call may go through now."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_progress or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_progress = False
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff: a random delay up to base * 2^attempt, capped."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+def call_with_retries(func, retries: int = 2, base_delay: float = 0.5, max_delay: float = 4.0, deadline: float = None):
+    """
+    Calls func() until it succeeds, retrying DMBackendError up to `retries` times with
+    jittered backoff. `deadline` is a time.monotonic() value; no retry starts after it.
+    Circuit-open and missing-fixture errors are not retried.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except (CircuitOpenError, FixtureMissing):
+            raise
+        except DMBackendError:
+            if attempt >= retries:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            time.sleep(delay)
+            attempt += 1
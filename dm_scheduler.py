@@ -0,0 +1,150 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from dm_resilience import DMTimeoutError
+
+# Lower numbers are served first
+PRIORITY_INTERACTIVE = 0   # Player-facing turns
+PRIORITY_SUMMARY = 5       # Session summaries and memory folding
+PRIORITY_SPECULATIVE = 9   # Pre-generated scenes nobody is waiting for yet
+
+class DMScheduler:
+    """
+    Orders DM requests that share one backend.
+
+    Each backend runs at most `max_in_flight` generations at once (overridable per backend
+    through `limits`). Waiting requests are served by priority, then by fair share between
+    sessions, then in arrival order. `reserved_interactive` slots are kept free for
+    interactive turns, so long summaries or speculative work can never occupy every slot.
+    """
+
+    def __init__(self, max_in_flight: int = 2, reserved_interactive: int = 1, limits: dict = None):
+        self.max_in_flight = max_in_flight
+        self.reserved_interactive = reserved_interactive
+        self.limits = limits or {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._waiting = {}     # backend -> list of tickets
+        self._in_flight = {}   # backend -> {"total": int, "background": int}
+        self._served = {}      # (backend, session_id) -> grants so far, for fair sharing
+        self._stats = {}       # backend -> counters
+
+    def _limit(self, backend: str) -> int:
+        return max(1, self.limits.get(backend, self.max_in_flight))
+
+    def _backend_stats(self, backend: str) -> dict:
+        return self._stats.setdefault(backend, {"served": 0, "total_wait": 0.0, "max_wait": 0.0})
+
+    def _can_start(self, backend: str, ticket: dict) -> bool:
+        running = self._in_flight.setdefault(backend, {"total": 0, "background": 0})
+        limit = self._limit(backend)
+        if running["total"] >= limit:
+            return False
+        if ticket["priority"] > PRIORITY_INTERACTIVE:
+            background_limit = max(1, limit - self.reserved_interactive)
+            return running["background"] < background_limit
+        return True
+
+    def _dispatch(self, backend: str):
+        """Grants slots to the best waiting tickets while capacity allows. Caller holds the lock."""
+        waiting = self._waiting.get(backend, [])
+        while waiting:
+            candidates = sorted(
+                waiting,
+                key=lambda t: (t["priority"], self._served.get((backend, t["session_id"]), 0), t["sequence"]),
+            )
+            ticket = next((t for t in candidates if self._can_start(backend, t)), None)
+            if ticket is None:
+                return
+
+            waiting.remove(ticket)
+            running = self._in_flight[backend]
+            running["total"] += 1
+            if ticket["priority"] > PRIORITY_INTERACTIVE:
+                running["background"] += 1
+
+            key = (backend, ticket["session_id"])
+            self._served[key] = self._served.get(key, 0) + 1
+
+            waited = time.monotonic() - ticket["queued_at"]
+            stats = self._backend_stats(backend)
+            stats["served"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+            ticket["granted"].set()
+
+    def _join_fair_share(self, backend: str, session_id: str):
+        """A newly active session starts level with the least-served active session, not at zero."""
+        active = [self._served.get((backend, t["session_id"]), 0) for t in self._waiting.get(backend, [])]
+        if active:
+            key = (backend, session_id)
+            self._served[key] = max(self._served.get(key, 0), min(active))
+
+    @contextmanager
+    def slot(self, backend: str, priority: int = PRIORITY_INTERACTIVE, session_id: str = "default",
+             deadline: float = None):
+        """
+        Blocks until the request may run on `backend`, then holds the slot for the with-block.
+        `deadline` is a time.monotonic() value; a request still queued then is dropped from
+        the queue and DMTimeoutError is raised.
+        """
+        ticket = {
+            "priority": priority,
+            "session_id": session_id,
+            "sequence": next(self._sequence),
+            "queued_at": time.monotonic(),
+            "granted": threading.Event(),
+        }
+        with self._lock:
+            self._join_fair_share(backend, session_id)
+            self._waiting.setdefault(backend, []).append(ticket)
+            self._dispatch(backend)
+
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not ticket["granted"].wait(timeout):
+                raise DMTimeoutError(f"Timed out waiting for a '{backend}' slot")
+        except BaseException:
+            with self._lock:
+                if ticket in self._waiting.get(backend, []):
+                    self._waiting[backend].remove(ticket)
+                    raise
+            self._release(backend, ticket)  # Granted just as we were interrupted
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(backend, ticket)
+
+    def _release(self, backend: str, ticket: dict):
+        with self._lock:
+            running = self._in_flight[backend]
+            running["total"] -= 1
+            if ticket["priority"] > PRIORITY_INTERACTIVE:
+                running["background"] -= 1
+            self._dispatch(backend)
+
+    def stats(self) -> dict:
+        """Returns queue depth, in-flight count and wait times per backend."""
+        with self._lock:
+            now = time.monotonic()
+            report = {}
+            for backend in set(self._waiting) | set(self._in_flight) | set(self._stats):
+                waiting = self._waiting.get(backend, [])
+                stats = self._backend_stats(backend)
+                by_priority = {}
+                for ticket in waiting:
+                    by_priority[ticket["priority"]] = by_priority.get(ticket["priority"], 0) + 1
+                report[backend] = {
+                    "queue_depth": len(waiting),
+                    "queued_by_priority": by_priority,
+                    "in_flight": self._in_flight.get(backend, {}).get("total", 0),
+                    "limit": self._limit(backend),
+                    "served": stats["served"],
+                    "avg_wait": stats["total_wait"] / stats["served"] if stats["served"] else 0.0,
+                    "max_wait": stats["max_wait"],
+                    "oldest_waiting": max((now - t["queued_at"] for t in waiting), default=0.0),
+                }
+            return report
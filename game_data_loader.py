@@ -1,45 +1,207 @@
+import copy
+import functools
 import json
 import os
+import tempfile
+import threading
+from sqlite_store import get_store
 
-DATA_DIR = "game_data"
+# Root of the game data files; override with GAME_DATA_DIR or set_data_dir()
+DATA_DIR = os.getenv("GAME_DATA_DIR", "data")
 
-# Ensure game_data directory exists
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+# Runtime state the game writes while playing; kept beside the saves, out of the content directory
+STATE_DIR = os.getenv("GAME_STATE_DIR", "saves")
+STATE_FILES = {"game_state.json"}
 
 # Default JSON structures (auto-created if missing)
 DEFAULT_JSONS = {
     "locations.json": {"locations": []},
     "organizations.json": {"organizations": []},
     "npcs.json": {"npcs": []},
-    "arcs.json": {"arcs": []}
+    "factions.json": {"factions": []},
+    "arcs.json": {"arcs": []},
+    "skills.json": {"skills": []},
+    "powers.json": {"powers": []},
+    "game_state.json": {"game_state": []},
 }
 
+# 📌 Shared Cache
+# Parsed files keyed by name: (mtime/size stamp, data, version). Every module reads game
+# data through here, so a file is parsed once and again only after it changes. The version
+# goes up on every parse or save, so consumers can tell when to rebuild derived indexes.
+_file_cache = {}
+_next_version = 0
+_value_cache = {}  # Values derived from game data (see cached); dropped by reload_data()
+_cache_lock = threading.RLock()
+
+# Process umask, for the permissions of newly created data files (reading it means setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def get_data_dir() -> str:
+    return DATA_DIR
+
+def data_path(file_name) -> str:
+    """Where a file lives: runtime state (STATE_FILES) under STATE_DIR, content under DATA_DIR."""
+    return os.path.join(STATE_DIR if file_name in STATE_FILES else DATA_DIR, file_name)
+
+def set_data_dir(path: str):
+    """Points the loader at another data root (e.g. a content pack) and drops cached data."""
+    global DATA_DIR
+    DATA_DIR = path
+    reload_data()
+
+def reload_data(file_name=None):
+    """
+    Hot reload for content authors: forgets cached data (one file, or everything) so the
+    next access re-reads it. Edits are also picked up automatically once a file's mtime or
+    size changes; this forces it, e.g. after an edit within the same timestamp tick.
+    """
+    with _cache_lock:
+        if file_name is None:
+            _file_cache.clear()
+        else:
+            _file_cache.pop(file_name, None)
+        _value_cache.clear()
+
+def cached(key: str):
+    """Decorator caching a zero-argument builder's result until the next reload_data() (or its invalidate())."""
+    def decorator(build):
+        @functools.wraps(build)
+        def wrapper():
+            with _cache_lock:
+                if key not in _value_cache:
+                    _value_cache[key] = build()
+                return _value_cache[key]
+
+        def invalidate():
+            with _cache_lock:
+                _value_cache.pop(key, None)
+
+        wrapper.invalidate = invalidate
+        return wrapper
+    return decorator
+
+def _store(file_name, stamp, data):
+    global _next_version
+    with _cache_lock:
+        _next_version += 1
+        _file_cache[file_name] = (stamp, data, _next_version)
+
+def data_version(*file_names) -> tuple:
+    """Current version of each file (re-reading any that changed); compare to detect edits."""
+    versions = []
+    with _cache_lock:  # Re-entrant; keeps a concurrent reload_data() from dropping the entry in between
+        for file_name in file_names:
+            load_json(file_name)
+            versions.append(_file_cache[file_name][2])
+    return tuple(versions)
+
+def _file_stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 def ensure_json_exists(file_name):
     """Ensures JSON files exist; creates them with a default structure if missing."""
-    file_path = os.path.join(DATA_DIR, file_name)
+    file_path = data_path(file_name)
     if not os.path.exists(file_path):
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(DEFAULT_JSONS[file_name], f, indent=4)
         print(f"✅ {file_name} was missing and has been created with a default structure.")
 
+def _load_document(store, file_name):
+    """load_json() for the SQLite backend: the stamp is the document's write counter."""
+    version = store.document_version(file_name)
+    with _cache_lock:
+        entry = _file_cache.get(file_name)
+        if entry is not None and version is not None and entry[0] == ("db", version):
+            return entry[1]
+
+    data = store.load_document(file_name)
+    if data is None:
+        data = copy.deepcopy(DEFAULT_JSONS[file_name])
+        store.save_document(file_name, data)
+        print(f"✅ {file_name} was missing and has been created with a default structure.")
+    _store(file_name, ("db", store.document_version(file_name)), data)
+    return data
+
 def load_json(file_name):
-    """Loads JSON data from the specified file in the game_data directory."""
-    file_path = os.path.join(DATA_DIR, file_name)
-    ensure_json_exists(file_name)  # Ensure file exists before loading
+    """
+    Loads JSON data from the specified file in the data or state directory (or the SQLite store).
+
+    The parsed data is cached and shared by every caller; it is re-parsed only when the
+    file's mtime or size changes. Treat it as read-only unless you save_json() it back.
+    """
+    store = get_store()
+    if store is not None:
+        return _load_document(store, file_name)
 
+    file_path = data_path(file_name)
+    stamp = _file_stamp(file_path)
+    with _cache_lock:
+        entry = _file_cache.get(file_name)
+        if entry is not None and stamp is not None and entry[0] == stamp:
+            return entry[1]
+
+    ensure_json_exists(file_name)  # Ensure file exists before loading
+    stamp = _file_stamp(file_path)
     with open(file_path, "r", encoding="utf-8") as f:
         try:
-            return json.load(f)
+            data = json.load(f)
         except json.JSONDecodeError as e:
             print(f"⚠️ JSON Error in {file_name}: {e}")
-            return DEFAULT_JSONS[file_name]  # Return default structure in case of error
+            data = copy.deepcopy(DEFAULT_JSONS[file_name])  # Return default structure in case of error
+
+    _store(file_name, stamp, data)
+    return data
+
+def replace_keeping_mode(temp_path, file_path):
+    """
+    Renames temp_path over file_path with file_path's permissions, or the umask default if
+    it is new. mkstemp creates temp files as 0600, which the rename would otherwise keep.
+    """
+    try:
+        mode = os.stat(file_path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(temp_path, mode)
+    os.replace(temp_path, file_path)
+
+def write_json_atomic(file_path, data, indent=4):
+    """Writes JSON to a temp file beside file_path and renames it over, so readers never see half a file."""
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        replace_keeping_mode(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
 
 def save_json(file_name, data):
-    """Saves updated JSON data to file."""
-    file_path = os.path.join(DATA_DIR, file_name)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    """Saves updated JSON data to file (atomically)."""
+    store = get_store()
+    if store is not None:
+        with _cache_lock:
+            _store(file_name, ("db", store.save_document(file_name, data)), data)
+        print(f"💾 {file_name} updated successfully.")
+        return
+
+    file_path = data_path(file_name)
+    with _cache_lock:
+        write_json_atomic(file_path, data)
+        _store(file_name, _file_stamp(file_path), data)
     print(f"💾 {file_name} updated successfully.")
 
 # ✅ LOAD FUNCTIONS
@@ -55,14 +217,135 @@ def get_npcs():
     """Loads all NPCs from JSON."""
     return load_json("npcs.json")["npcs"]
 
+def get_factions():
+    """Loads all factions from JSON."""
+    return load_json("factions.json")["factions"]
+
+def get_skills():
+    """Loads all skills from JSON."""
+    return load_json("skills.json")["skills"]
+
+def get_powers():
+    """Loads all powers from JSON."""
+    return load_json("powers.json")["powers"]
+
 def get_arcs():
     """Loads all campaign arcs from JSON."""
     return load_json("arcs.json")["arcs"]
 
+# 📦 BATCHED MUTATIONS
+class DataBatch:
+    """
+    A transaction against one game data file: any number of updates, adds and removes,
+    written once on commit.
+
+    Lookups go through a keyed index (built on first use per key), so each change costs
+    O(1) instead of a scan of the file. Changed entries are copied before they are
+    touched, so the shared cached data is left alone until commit, and nothing is written
+    if the batch is discarded. Use it as a context manager to commit on success:
+
+        with batch("npcs.json") as npcs:
+            npcs.update("Oracle", {"evolving_state": "Ascended"})
+            npcs.add({"name": "Warp Stalker", "role": "Neutral"})
+            npcs.remove("Iron Maw")
+    """
+
+    def __init__(self, file_name, key="name"):
+        self.file_name = file_name
+        self.group = file_name.split(".")[0]  # Extracts "locations", "npcs", etc.
+        self.key = key
+        self._data = load_json(file_name)
+        self._entries = list(self._data[self.group])  # Shallow copy; entries are copied on write
+        self._removed = set()  # Positions removed in this batch
+        self._indexes = {}  # key -> {value: [positions]}
+        self.changes = 0
+
+    def _index(self, key):
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = {}
+            for position, entry in enumerate(self._entries):
+                if position not in self._removed and key in entry:
+                    index.setdefault(entry[key], []).append(position)
+        return index
+
+    def _positions(self, value, key):
+        return list(self._index(key or self.key).get(value, ()))
+
+    def get(self, value, key=None):
+        """Returns the first entry whose key field equals value, or None."""
+        positions = self._positions(value, key)
+        return self._entries[positions[0]] if positions else None
+
+    def update(self, value, updates, key=None, first_only=False) -> int:
+        """
+        Applies updates to every entry whose key field equals value (only the first one with
+        first_only). Returns how many were updated.
+        """
+        positions = self._positions(value, key)
+        if first_only:
+            positions = positions[:1]
+        for position in positions:
+            old = self._entries[position]
+            new = self._entries[position] = {**old, **updates}
+            for indexed_key, index in self._indexes.items():
+                if indexed_key in updates and old.get(indexed_key) != new[indexed_key]:
+                    if indexed_key in old:
+                        index[old[indexed_key]].remove(position)
+                    index.setdefault(new[indexed_key], []).append(position)
+        self.changes += len(positions)
+        return len(positions)
+
+    def add(self, new_entry) -> bool:
+        """Appends new_entry unless an entry with the same key value already exists. Returns True if added."""
+        if self.key in new_entry and self._index(self.key).get(new_entry[self.key]):
+            return False
+        position = len(self._entries)
+        self._entries.append(new_entry)
+        for indexed_key, index in self._indexes.items():
+            if indexed_key in new_entry:
+                index.setdefault(new_entry[indexed_key], []).append(position)
+        self.changes += 1
+        return True
+
+    def remove(self, value, key=None) -> int:
+        """Removes every entry whose key field equals value. Returns how many were removed."""
+        positions = self._positions(value, key)
+        for position in positions:
+            entry = self._entries[position]
+            self._removed.add(position)
+            for indexed_key, index in self._indexes.items():
+                if indexed_key in entry:
+                    index[entry[indexed_key]].remove(position)
+        self.changes += len(positions)
+        return len(positions)
+
+    def commit(self) -> bool:
+        """Writes the file once (atomically) if anything changed. Returns True if it was written."""
+        if not self.changes:
+            return False
+        entries = [entry for position, entry in enumerate(self._entries) if position not in self._removed]
+        save_json(self.file_name, {**self._data, self.group: entries})
+        self._data = load_json(self.file_name)
+        self._entries, self._removed, self._indexes, self.changes = list(entries), set(), {}, 0
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+def batch(file_name, key="name") -> DataBatch:
+    """Opens a batch of changes to a game data file, keyed by `key` (e.g. 'name' or 'id')."""
+    return DataBatch(file_name, key)
+
 # 🔄 UPDATE FUNCTIONS
 def update_json(file_name, key, match_value, updates):
     """
-    Updates an entry in a JSON file.
+    Updates the first matching entry in a JSON file.
     
     Args:
         file_name (str): JSON file name.
@@ -70,13 +353,8 @@ def update_json(file_name, key, match_value, updates):
         match_value (str|int): Value to match against the key.
         updates (dict): Dictionary containing fields to update.
     """
-    data = load_json(file_name)
-    entries = data[file_name.split(".")[0]]
-
-    for entry in entries:
-        if entry.get(key) == match_value:
-            entry.update(updates)
-            save_json(file_name, data)
+    with batch(file_name, key) as changes:
+        if changes.update(match_value, updates, first_only=True):
             print(f"✅ {file_name}: Updated {key} '{match_value}' with {updates}")
             return
 
@@ -91,15 +369,13 @@ def add_entry(file_name, new_entry):
         file_name (str): JSON file name.
         new_entry (dict): The new entry data.
     """
-    data = load_json(file_name)
-    key = file_name.split(".")[0]  # Extracts "locations", "npcs", etc.
+    key = "name" if "name" in new_entry else "id"
+    with batch(file_name, key) as changes:
+        if changes.add(new_entry):
+            print(f"✅ Added new entry to {file_name}: {new_entry['name'] if 'name' in new_entry else 'ID ' + str(new_entry.get('id'))}")
+            return
 
-    if new_entry not in data[key]:
-        data[key].append(new_entry)
-        save_json(file_name, data)
-        print(f"✅ Added new entry to {file_name}: {new_entry['name'] if 'name' in new_entry else 'ID ' + str(new_entry.get('id'))}")
-    else:
-        print(f"⚠️ Entry already exists in {file_name}.")
+    print(f"⚠️ Entry already exists in {file_name}.")
 
 # ❌ REMOVE ENTRY FUNCTION
 def remove_entry(file_name, key, match_value):
@@ -111,14 +387,9 @@ def remove_entry(file_name, key, match_value):
         key (str): The field to match (e.g., 'id' or 'name').
         match_value (str|int): Value to match against the key.
     """
-    data = load_json(file_name)
-    key_group = file_name.split(".")[0]  # Extracts "locations", "npcs", etc.
-
-    updated_entries = [entry for entry in data[key_group] if entry.get(key) != match_value]
+    with batch(file_name, key) as changes:
+        if changes.remove(match_value):
+            print(f"🗑️ Removed entry with {key} '{match_value}' from {file_name}.")
+            return
 
-    if len(updated_entries) < len(data[key_group]):
-        data[key_group] = updated_entries
-        save_json(file_name, data)
-        print(f"🗑️ Removed entry with {key} '{match_value}' from {file_name}.")
-    else:
-        print(f"❌ {key} '{match_value}' not found in {file_name}.")
+    print(f"❌ {key} '{match_value}' not found in {file_name}.")
@@ -1,22 +1,67 @@
 import os
+import copy
 import json
+import functools
 from character import create_character, Character, character_to_dict, dict_to_character
 from combat import Combat, Combatant
-from dm_interface import interactive_story_session
-from game_data_loader import get_locations, get_organizations, get_npcs, get_arcs, update_json
+from dm_interface import (
+    interactive_story_session, send_prompt_to_dm, prompt_token_budget, DMSession, ERROR_RESPONSES, PRIORITY_SPECULATIVE
+)
+from game_data_loader import update_json
+from world_repository import get_world
+from world import get_world_state, restore_world_state
+from sqlite_store import get_store
+from save_journal import SaveJournal
+from save_codec import SCHEMA_VERSION, SaveFormatError, migrate, read_save, write_save
+from autosave_worker import AutosaveWorker
+from save_manifest import SaveManifest, query_entries
+from scene_speculator import SceneSpeculator
+from lore_index import LoreIndex
+from lore_guard import LoreGuard
+from prompt_templates import INTRO_TEMPLATE, LOCATION_TEMPLATE, ARC_EVENTS_TEMPLATE, ARC_START_TEMPLATE
 
 SAVE_DIR = "saves"
+AUTOSAVE_FILE = "autosave.json"  # Snapshot + delta journal (see save_journal)
+SPECULATIVE_JOBS = 2  # Max likely next scenes pre-generated at once
+LORE_SNIPPETS = 4  # Lore entries attached to each DM prompt
 
 class GameEngine:
-    def __init__(self, dm_option: str = 'mistral'):
+    def __init__(self, dm_option: str = 'mistral', speculate: bool = True):
         """Initializes the game engine with dynamic JSON-loaded data."""
         self.player_character = None
-        self.npcs = get_npcs()
-        self.locations = get_locations()
-        self.organizations = get_organizations()
-        self.arcs = get_arcs()
         self.dm_option = dm_option  # AI model being used (e.g., Mistral, DeepSeek)
         self.story_state = {"arc": None, "events_completed": []}  # Tracks structured progression
+        self.current_scene = None  # Key of the scene being played, e.g. ("location", "Downtown")
+        self.dm_session = DMSession(dm_option)  # Warm backend context reused across scenes
+        self.speculator = SceneSpeculator(self._generate_scene, SPECULATIVE_JOBS) if speculate else None
+        self.lore = LoreIndex()  # Retrieves the world data relevant to each prompt
+        self.lore_guard = LoreGuard()  # Flags names in DM output that the world data doesn't know
+        self.autosave = SaveJournal(os.path.join(SAVE_DIR, AUTOSAVE_FILE))
+        self.autosaver = AutosaveWorker(self._write_autosave)  # Debounced, off the game loop
+        self.saves = SaveManifest(SAVE_DIR)  # Picker metadata without opening the saves
+
+    # 🌍 World Data (shared, cached and hot-reloaded by game_data_loader)
+    @property
+    def world(self):
+        """Indexed NPCs, locations, factions and arcs, shared with arc_loader."""
+        return get_world()
+
+    @property
+    def npcs(self):
+        return self.world.npcs
+
+    @property
+    def locations(self):
+        return self.world.locations
+
+    @property
+    def arcs(self):
+        return self.world.arcs
+
+    @property
+    def organizations(self):
+        """Organizations are the factions in the world data."""
+        return self.world.factions
 
     def start_game(self):
         """Starts a new game and initializes character creation or loads an existing save."""
@@ -30,38 +75,45 @@ class GameEngine:
 
         print("\n🎭 **Creating a New Character...**")
         self.player_character = create_character()
+        restore_world_state(None)  # A new game starts from the seed world
         self.story_state["arc"] = 1  # Default starting arc
+        self.discard_speculation()
         self.intro_scene()
         self.auto_save_game()  # Save immediately after character creation
 
     def intro_scene(self):
         """Ensures AI follows the structured introduction of the game."""
-        prompt = (
-            f"Setting up the introduction for {self.player_character.name}, a new metahuman in Paragon City.\n"
-            f"Keep responses within the pre-defined story arc:\n"
-            f"Arc 1: 'The Awakening' – A mysterious power surge grants metahuman abilities.\n"
-            f"Describe the character awakening in the city and their first impressions."
+        prompt = self.render_prompt(
+            INTRO_TEMPLATE,
+            name=self.player_character.name,
+            lore=self.lore_snippets("Paragon City awakening mysterious power surge metahuman abilities"),
         )
-        interactive_story_session(prompt, self.dm_option)
+        self.run_scene(prompt, "intro_scene", ("intro",))
 
     def enter_location(self, location_name: str):
         """Generates AI-driven scene descriptions for known locations."""
-        location = next((loc for loc in self.locations if loc["name"].lower() == location_name.lower()), None)
+        location = self.world.location(location_name)
         if not location:
             print("❌ Location not found.")
             return
 
-        prompt = (
-            f"Describe {self.player_character.name} arriving at {location['name']}.\n"
-            f"Do NOT introduce new NPCs or factions. Keep the scene within:\n"
-            f"🌍 **Location Description:** {location['description']}\n"
-            f"🎭 **Existing NPCs:** {', '.join(npc['name'] for npc in self.npcs if location['name'] in npc.get('known_locations', []))}"
+        self.run_scene(self.location_prompt(location), "enter_location", ("location", location["name"]))
+
+    def location_prompt(self, location: dict) -> str:
+        """Builds the scene prompt for arriving at a location."""
+        query = f"{location['name']} {location['description']} {' '.join(location.get('notable_npcs', []))}"
+        return self.render_prompt(
+            LOCATION_TEMPLATE,
+            name=self.player_character.name,
+            location=location["name"],
+            description=location["description"],
+            npcs=[npc["name"] for npc in self.world.npcs_at(location["name"])],
+            lore=self.lore_snippets(query, exclude={location["name"]}),
         )
-        interactive_story_session(prompt, self.dm_option)
 
     def trigger_arc_events(self, arc_number: int):
         """Triggers structured events for a given arc."""
-        arc_data = next((arc for arc in self.arcs if arc["id"] == arc_number), None)
+        arc_data = self.world.arc(arc_number)
         if not arc_data:
             print("❌ Error: Arc data not found.")
             return
@@ -69,49 +121,93 @@ class GameEngine:
         self.story_state["arc"] = arc_number
         update_json("game_state.json", "arc", arc_number, {"events_completed": []})  # Reset completed events
 
-        prompt = (
-            f"📖 **Arc {arc_number}: '{arc_data['name']}'**\n"
-            f"Stay within the pre-defined plotline:\n"
-            f"📝 **Storyline:** {arc_data['description']}\n"
-            f"🔹 **Key Events:** {', '.join(arc_data['key_events'])}\n"
-            f"🎭 Describe how {self.player_character.name} gets involved in the first event."
+        query = f"{arc_data['name']} {arc_data['description']} {' '.join(arc_data['key_events'])}"
+        prompt = self.render_prompt(
+            ARC_EVENTS_TEMPLATE,
+            arc_number=arc_number,
+            arc_name=arc_data["name"],
+            description=arc_data["description"],
+            events=arc_data["key_events"],
+            name=self.player_character.name,
+            lore=self.lore_snippets(query, exclude={arc_data["name"]}),
         )
-        interactive_story_session(prompt, self.dm_option)
+        self.run_scene(prompt, "trigger_arc_events", ("arc_events", arc_number), new_state=True)
 
-    def save_game(self, filename="savegame.json"):
-        """Saves game state into a structured JSON file."""
-        if not os.path.exists(SAVE_DIR):
-            os.makedirs(SAVE_DIR)
+    def save_data(self) -> dict:
+        """The full game state as stored in a save."""
+        return {
+            "schema_version": SCHEMA_VERSION,  # Older saves are upgraded by save_codec migrations on load
+            "player_character": character_to_dict(self.player_character),
+            "story_state": self.story_state,
+            "dm_session": self.dm_session.to_dict(),
+            "world_state": get_world_state().to_dict(),  # Checkpoint + journal of NPC/faction changes
+        }
 
+    def save_game(self, filename="savegame.sav"):
+        """
+        Saves game state: compact binary (see save_codec) by default, readable JSON for a
+        .json filename (handy for debugging), or a row in the SQLite store.
+        """
         if not self.player_character:
             print("❌ Error: No player character to save.")
             return
 
-        save_data = {
-            "player_character": character_to_dict(self.player_character),
-            "story_state": self.story_state
-        }
-
-        filepath = os.path.join(SAVE_DIR, filename)
-        with open(filepath, 'w') as f:
-            json.dump(save_data, f, indent=4)
+        save_data = self.save_data()
+        store = get_store()
+        if filename == AUTOSAVE_FILE:
+            self.autosaver.flush()  # A pending background autosave must not land on top of this one
+        if store is not None:
+            store.save_game(filename, save_data)
+        elif filename == AUTOSAVE_FILE:
+            self.autosave.snapshot(save_data)  # Full snapshot; the journal restarts from here
+        elif filename.endswith(".json"):
+            if not os.path.exists(SAVE_DIR):
+                os.makedirs(SAVE_DIR)
+            filepath = os.path.join(SAVE_DIR, filename)
+            with open(filepath, 'w') as f:
+                json.dump(save_data, f, indent=4)
+        else:
+            write_save(os.path.join(SAVE_DIR, filename), save_data)
+        if store is None:
+            self.saves.record(filename, save_data)
 
         print(f"💾 Game saved successfully as {filename}.")
 
     def auto_save_game(self):
-        """Automatically saves the game progress without user input."""
-        self.save_game("autosave.json")
+        """Automatically saves the game progress without user input; the write happens in the background."""
+        if not self.player_character:
+            return
+        self.autosaver.request(copy.deepcopy(self.save_data()))  # Detached from the live game state
+
+    def _write_autosave(self, save_data: dict):
+        store = get_store()
+        if store is not None:
+            store.save_game(AUTOSAVE_FILE, save_data)
+        else:
+            self.autosave.append(save_data)  # Journals only what changed
+            self.saves.record(AUTOSAVE_FILE, save_data)
 
-    def load_game(self, filename="savegame.json"):
-        """Loads game progress from a saved file."""
-        filepath = os.path.join(SAVE_DIR, filename)
-        if not os.path.exists(filepath):
+    def shutdown(self):
+        """Writes any pending autosave; call before exiting."""
+        self.autosaver.close()
+
+    def load_game(self, filename="savegame.sav"):
+        """Loads game progress from a saved file (or the SQLite store)."""
+        self.autosaver.flush()  # Autosave on disk must be current before it is read or replaced
+        store = get_store()
+        try:
+            if store is not None:
+                data = store.load_game(filename)
+                data = migrate(data) if data is not None else None
+            else:
+                data = read_save(os.path.join(SAVE_DIR, filename))  # Binary or JSON (+ delta journal), migrated
+        except SaveFormatError as e:
+            print(f"❌ Could not load {filename}: {e}")
+            return
+        if data is None:
             print("❌ No save file found.")
             return
 
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-
         if "player_character" not in data:
             print(f"❌ Error: Save file {filename} is missing player character data. Starting new game instead.")
             self.start_game()
@@ -119,21 +215,33 @@ class GameEngine:
 
         self.player_character = dict_to_character(data["player_character"])
         self.story_state = data.get("story_state", {"arc": None, "events_completed": []})
+        self.dm_session = DMSession.from_dict(data.get("dm_session"), self.dm_option)  # Stale contexts are dropped
+        restore_world_state(data.get("world_state"))  # Older saves start from the seed world
+        self.discard_speculation()
         print(f"✅ Game loaded successfully from {filename}.")
 
     def list_saved_games(self):
-        """Returns a list of available save files."""
-        if not os.path.exists(SAVE_DIR):
-            return []
-        return [f for f in os.listdir(SAVE_DIR) if f.endswith(".json")]
+        """Returns a list of available save files, most recent first."""
+        return [entry["file"] for entry in self.saved_game_entries()]
+
+    def saved_game_entries(self, sort="saved_at", descending=True, **filters) -> list:
+        """
+        Save metadata (character, codename, level, arc, saved_at, size, checksum) for the
+        save picker, sorted and filtered (see save_manifest.query_entries). No save is opened;
+        load one with load_game() once it is picked.
+        """
+        store = get_store()
+        if store is not None:
+            return query_entries(store.save_entries(), sort, descending, **filters)
+        return self.saves.query(sort, descending, **filters)
 
     def list_available_arcs(self):
         """Returns a list of available arcs."""
-        return [f"{arc['id']}: {arc['name']} - {arc['description']}" for arc in self.arcs]
+        return self.world.arc_summaries()
 
     def start_campaign_arc(self, arc_number: int):
         """Loads and starts a structured campaign arc with AI-driven storytelling."""
-        arc_data = next((arc for arc in self.arcs if arc["id"] == arc_number), None)
+        arc_data = self.world.arc(arc_number)
         if not arc_data:
             print(f"❌ Invalid arc number. Available arcs: {self.list_available_arcs()}")
             return
@@ -141,14 +249,96 @@ class GameEngine:
         self.story_state["arc"] = arc_number
         self.story_state["events_completed"] = []
 
-        relevant_npcs = [npc["name"] for npc in self.npcs if "relevant_arc" in npc and arc_number in npc["relevant_arc"]]
-        relevant_locations = [loc["name"] for loc in self.locations if "arc_restricted" in loc and arc_number in loc["arc_restricted"]]
+        self.run_scene(self.arc_prompt(arc_data), "start_campaign_arc", ("arc", arc_number), new_state=True)
+
+    def arc_prompt(self, arc_data: dict) -> str:
+        """Builds the opening prompt for a campaign arc."""
+        arc_number = arc_data["id"]
+        relevant_npcs = [npc["name"] for npc in self.world.arc_npcs(arc_number)]
+        relevant_locations = [loc["name"] for loc in self.world.arc_locations(arc_number)]
+
+        query = f"{arc_data['name']} {arc_data['description']} {' '.join(arc_data.get('key_events', []))}"
+        return self.render_prompt(
+            ARC_START_TEMPLATE,
+            arc_number=arc_number,
+            arc_name=arc_data["name"],
+            description=arc_data["description"],
+            npcs=relevant_npcs,
+            locations=relevant_locations,
+            name=self.player_character.name,
+            lore=self.lore_snippets(query, exclude={arc_data["name"]}),
+        )
+
+    # 📜 Prompt Building
+    def lore_snippets(self, query: str, exclude=()) -> list:
+        """The lore entries most relevant to query, best first."""
+        return [snippet for _, _, _, snippet in self.lore.search(query, LORE_SNIPPETS, exclude=exclude)]
 
-        prompt = (
-            f"📖 **Begin Arc {arc_number}: '{arc_data['name']}'**\n"
-            f"🔹 **Storyline:** {arc_data['description']}\n"
-            f"🎭 **NPCs:** {', '.join(relevant_npcs) if relevant_npcs else 'None'}\n"
-            f"🌍 **Locations:** {', '.join(relevant_locations) if relevant_locations else 'None'}\n"
-            f"Describe how {self.player_character.name} enters this arc while staying within known lore."
+    def render_prompt(self, template, **values) -> str:
+        """Fills a scene template, trimming its optional sections to the backend's prompt budget."""
+        return template.render(prompt_token_budget(self.dm_option), self.dm_option, **values)
+
+    # ⚡ Scene Playback & Speculative Pre-generation
+    def run_scene(self, prompt: str, call_site: str = None, scene: tuple = None, new_state: bool = False):
+        """
+        Plays a scene, serving a pre-generated opening when one is ready. With new_state
+        (e.g. a new arc), the other speculative scenes are discarded once this one is taken.
+        """
+        self.current_scene = scene
+        if self.player_character:
+            self.lore_guard.add_names([self.player_character.name])
+        pregenerated = self.speculator.take(prompt) if self.speculator else None
+        if new_state:
+            self.discard_speculation()
+        interactive_story_session(
+            prompt,
+            self.dm_option,
+            self.dm_session,
+            initial_response=pregenerated,
+            on_turn=self.after_turn,
+            call_site=call_site,
+            lore=self.lore,
+            guard=self.lore_guard,
         )
-        interactive_story_session(prompt, self.dm_option)
+
+    def predict_next_scenes(self):
+        """
+        Yields (scene key, build) for the scenes the player is most likely to open next,
+        most likely first, leaving out the one being played. build() renders the scene's
+        prompt; each involves lore searches, so the speculator only calls it for scenes it has room for.
+        """
+        arc_number = self.story_state.get("arc")
+        if not self.player_character or arc_number is None:
+            return
+
+        # Locations tied to the current arc, those with notable NPCs first; the next arc's opening second
+        arc_locations = self.world.arc_locations(arc_number)
+        arc_locations.sort(key=lambda loc: not loc.get("notable_npcs"))
+        scenes = [(("location", loc["name"]), functools.partial(self.location_prompt, loc)) for loc in arc_locations]
+
+        next_arc = self.world.arc(arc_number + 1)
+        if next_arc:
+            scenes.insert(1, (("arc", next_arc["id"]), functools.partial(self.arc_prompt, next_arc)))
+        for scene, build in scenes:
+            if scene != self.current_scene:
+                yield scene, build
+
+    def after_turn(self):
+        """Runs after each DM response while the player reads it: autosave and pre-generate next scenes."""
+        self.auto_save_game()
+        self.speculate_next_scenes()
+
+    def speculate_next_scenes(self):
+        """Queues likely next scenes for background generation; prompts are built off the game loop."""
+        if self.speculator:
+            self.speculator.speculate(self.predict_next_scenes())
+
+    def discard_speculation(self):
+        """Drops pre-generated scenes once the game state they were built from changes."""
+        if self.speculator:
+            self.speculator.invalidate()
+
+    def _generate_scene(self, prompt: str) -> str:
+        response = send_prompt_to_dm(prompt, self.dm_option, session=self.dm_session, priority=PRIORITY_SPECULATIVE,
+                                     call_site="speculation")
+        return "" if response in ERROR_RESPONSES else response
@@ -0,0 +1,315 @@
+import re
+import threading
+from collections import deque
+import world
+from game_data_loader import load_json, data_version
+from lore_index import LORE_FILES
+
+# Fields (besides "name") whose string values, list items or dict keys are entity names
+NAME_FIELDS = {
+    "leader", "location", "faction", "affiliation", "notable_members", "notable_npcs", "factions",
+    "rival_factions", "allied_factions", "known_locations", "locked_locations", "influence", "upgrades",
+    "key_events", "synergy",
+}
+
+# Capitalized words that are ordinary English or game vocabulary, not entities
+COMMON_WORDS = set("""
+a an the this that these those there here then now when where while what which who whom whose why how
+i you your yours he him his she her hers it its we us our they them their my me mine
+and but or nor so yet for if as at by in on of to up with without into onto from over under after before
+above below across along around behind beyond near through during until upon against among between
+all any both each every few many most much no none not one some several such other another only just
+is are was were be been being am do does did have has had can could will would shall should may might must
+yes no oh ah hmm well okay ok suddenly meanwhile finally still even perhaps maybe instead again once
+first second third next last new old welcome hello hey listen look watch wait stop go come remember
+monday tuesday wednesday thursday friday saturday sunday january february march april may june july
+august september october november december north south east west mr mrs ms dr sir madam lord lady captain
+detective mayor officer agent doctor professor chief hero heroes villain villains dm player gm
+arc act chapter scene city metahuman metahumans superhuman superhumans power powers earth
+""".split())
+
+TRIM_CHARS = 4096  # Judged text a LoreScan accumulates before dropping it
+
+_CAPITALIZED_RUN = re.compile(r"[A-Z][\w'’-]*(?:[ \t]+[A-Z][\w'’-]*)*")
+_SENTENCE_START = re.compile(r"(?:^|[.!?:;…\"“”*\n]\s*|\s[-–—]\s*)$")
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+def _word_key(word: str) -> str:
+    """Lowercased word without surrounding quotes/dashes or a possessive 's."""
+    word = word.lower().strip("'’-")
+    return word[:-2] if word.endswith(("'s", "’s")) else word
+
+def _phrases(name: str):
+    """Every run of consecutive words in a name ('anya calloway', 'calloway', ...)."""
+    words = [_word_key(word) for word in name.split()]
+    for start in range(len(words)):
+        for end in range(start + 1, len(words) + 1):
+            yield " ".join(words[start:end])
+
+class NameMatcher:
+    """
+    Aho-Corasick automaton over lowercased names. Scanning is one pass over the text no
+    matter how many names are loaded, and the state carries over between chunks.
+    """
+
+    def __init__(self, names):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [0]  # Length of the longest name ending at each node (0 = none)
+        self.max_length = 0
+        for name in names:
+            self._add(name)
+        self._link()
+
+    def _add(self, name: str):
+        node = 0
+        for char in name:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(0)
+                self.goto[node][char] = nxt
+            node = nxt
+        self.output[node] = max(self.output[node], len(name))
+        self.max_length = max(self.max_length, len(name))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = max(self.output[child], self.output[self.fail[child]])
+
+    def step(self, node: int, char: str) -> int:
+        while node and char not in self.goto[node]:
+            node = self.fail[node]
+        return self.goto[node].get(char, 0)
+
+class LoreGuard:
+    """
+    Flags capitalized names in DM output that are not part of the known world.
+
+    The catalog is every name in the lore data files (rebuilt when they change), the
+    world.py seed data and any extra names added by the game (e.g. the player character).
+    A name counts as known if it matches a catalog entry or a run of words inside one (after
+    dropping titles and common words), so 'Calloway' and 'Detective Calloway' are fine once
+    'Detective Anya Calloway' is known.
+    """
+
+    def __init__(self, files: dict = None, extra_names=()):
+        self.files = files or LORE_FILES
+        self._extra = set(extra_names)
+        self._versions = None
+        self._matcher = None
+        self._known_phrases = set()
+        self._lock = threading.Lock()
+
+    # 📌 Catalog
+    def add_names(self, names):
+        """Adds names (e.g. the player character) and rebuilds the matcher on next use."""
+        with self._lock:
+            new_names = {name for name in names if name} - self._extra
+            if new_names:
+                self._extra.update(new_names)
+                self._versions = None
+
+    def _collect(self, value, names: set):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key == "name" and isinstance(item, str):
+                    names.add(item)
+                elif key in NAME_FIELDS:
+                    if isinstance(item, dict):
+                        names.update(str(name) for name in item)
+                    elif isinstance(item, list):
+                        names.update(str(name).split(" - ")[0] for name in item if isinstance(name, str))
+                    elif isinstance(item, str):
+                        names.add(item)
+                if isinstance(item, (dict, list)):
+                    self._collect(item, names)
+        elif isinstance(value, list):
+            for item in value:
+                self._collect(item, names)
+
+    def catalog(self) -> set:
+        """Every known entity name."""
+        names = set(self._extra)
+        for file_name, kind in self.files.items():
+            data = load_json(file_name)
+            if isinstance(data, dict):
+                self._collect(data.get(kind, []), names)
+
+        for location in world.get_core_locations() + world.get_global_locations():
+            names.update([location.name, location.associated_faction, *location.missions])
+        for organization in world.get_organizations():
+            names.add(organization.name)
+        for npc in world.get_npcs():
+            names.update([npc.name, npc.affiliation, *npc.reputation])
+        return {name for name in names if name and name.strip()}
+
+    def _ensure_matcher(self) -> NameMatcher:
+        versions = data_version(*self.files)
+        with self._lock:
+            if self._matcher is None or versions != self._versions:
+                names = {_normalize(name) for name in self.catalog()}
+                self._matcher = NameMatcher(names)
+                self._known_phrases = {
+                    phrase for name in names
+                    for phrase in _phrases(" ".join(w for w in name.split() if _word_key(w) not in COMMON_WORDS))
+                }
+                self._versions = versions
+            return self._matcher
+
+    # 📌 Scanning
+    def stream(self, context: str = ""):
+        """Returns a LoreScan that checks text fed to it chunk by chunk."""
+        return LoreScan(self, self._ensure_matcher(), context)
+
+    def scan(self, text: str, context: str = "") -> list:
+        """Returns the unknown names in text, in order of first appearance."""
+        scan = self.stream(context)
+        scan.feed(text)
+        return scan.finish()
+
+class LoreScan:
+    """
+    Incremental check of one response. Each character goes through the name matcher once;
+    capitalized runs are judged once the text after them can no longer complete a name.
+    `context` (usually the prompt) contributes words that are allowed for this turn.
+    """
+
+    def __init__(self, guard: LoreGuard, matcher: NameMatcher, context: str = ""):
+        self.matcher = matcher
+        self.known_phrases = guard._known_phrases
+        self.allowed = {_word_key(word) for word in re.findall(r"\b[A-Z][\w'’-]*", context or "")}
+        self.text = ""
+        self.lowered = ""
+        self.node = 0
+        self.covered = []  # (start, end) spans of known names, in order of their end
+        self.cursor = 0  # First span in covered that may still overlap a run not yet judged
+        self.committed = 0  # Text before this offset has been judged
+        self.unknown = []
+
+    @staticmethod
+    def _fold(char: str) -> str:
+        """Lowercases one character, keeping it one character long so offsets line up."""
+        if char.isspace():
+            return " "
+        lowered = char.lower()
+        return lowered if len(lowered) == 1 else char
+
+    def feed(self, chunk: str):
+        start = len(self.text)
+        self.text += chunk
+        lowered = "".join(self._fold(char) for char in chunk)
+        self.lowered += lowered
+        for offset, char in enumerate(lowered, start):
+            self.node = self.matcher.step(self.node, char)
+            length = self.matcher.output[self.node]
+            if length and self._at_word_edges(offset + 1 - length, offset + 1):
+                self.covered.append((offset + 1 - length, offset + 1))
+        self._judge(len(self.text) - self.matcher.max_length - 1)
+
+    def _at_word_edges(self, start: int, end: int) -> bool:
+        before = self.lowered[start - 1] if start > 0 else " "
+        after = self.lowered[end] if end < len(self.lowered) else None
+        if after is None:
+            return not before.isalnum()  # Might still be a prefix of a longer word; recheck on the next chunk
+        return not before.isalnum() and not after.isalnum()
+
+    def _judge(self, limit: int):
+        """Checks capitalized runs that end before limit."""
+        if limit <= self.committed:
+            return
+        # Only cut at whitespace followed by something that cannot extend a capitalized run
+        cut = limit
+        floor = max(self.committed, limit - 256)
+        while cut > floor and not (self.text[cut - 1].isspace() and not self.text[cut].isupper()):
+            cut -= 1
+        if cut <= floor:
+            return
+
+        for match in _CAPITALIZED_RUN.finditer(self.text, self.committed, cut):
+            self._check_run(match.start(), match.end(), match.group())
+        self.committed = cut
+        self._trim()
+
+    def _trim(self):
+        """
+        Drops judged text, keeping a name's length of lookbehind, so appending chunks stays
+        cheap however long the response grows. Offsets (committed, covered) shift with it.
+        """
+        drop = self.committed - self.matcher.max_length - 1
+        if drop < TRIM_CHARS:
+            return
+        # Runs still to be judged start at or after committed, so only spans ending past it matter
+        self.covered = [(start - drop, end - drop) for start, end in self.covered[self.cursor:] if end > self.committed]
+        self.cursor = 0
+        self.text = self.text[drop:]
+        self.lowered = self.lowered[drop:]
+        self.committed -= drop
+
+    def _overlaps_known_name(self, start: int, end: int) -> bool:
+        """
+        Whether a known name overlaps [start, end). Runs are checked left to right, so spans
+        ending at or before start are skipped for good; a span ending max_length or more past
+        end starts at or after end, as does every span after it.
+        """
+        covered = self.covered
+        while self.cursor < len(covered) and covered[self.cursor][1] <= start:
+            self.cursor += 1
+        for index in range(self.cursor, len(covered)):
+            span_start, span_end = covered[index]
+            if span_end >= end + self.matcher.max_length:
+                return False
+            if span_start < end:
+                return True
+        return False
+
+    def _check_run(self, start: int, end: int, run: str):
+        if self._overlaps_known_name(start, end):
+            return
+        words = run.split()
+        if len(words) == 1 and _SENTENCE_START.search(self.text[max(0, start - 3):start]):
+            return  # A lone capitalized word starting a sentence is usually ordinary prose
+        # Titles, common words and acronyms say nothing about whether the entity exists
+        remaining = [_word_key(word) for word in words if _word_key(word) not in COMMON_WORDS and not word.isupper()]
+        if not remaining or " ".join(remaining) in self.known_phrases:
+            return
+        if all(word in self.allowed for word in remaining):
+            return  # Named in the prompt, so the model was told about it
+        if run not in self.unknown:
+            self.unknown.append(run)
+
+    def wrap(self, chunks):
+        """Passes chunks through unchanged while scanning them."""
+        try:
+            for chunk in chunks:
+                self.feed(chunk)
+                yield chunk
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def finish(self) -> list:
+        """Checks whatever text is left and returns every unknown name found."""
+        self.text += " "
+        self.lowered += " "
+        self.covered = [
+            span for span in self.covered if self._at_word_edges(*span)
+        ]
+        self.cursor = 0
+        if len(self.text) - 1 > self.committed:
+            for match in _CAPITALIZED_RUN.finditer(self.text, self.committed):
+                self._check_run(match.start(), match.end(), match.group())
+            self.committed = len(self.text)
+        return list(self.unknown)
@@ -0,0 +1,157 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from game_data_loader import load_json, data_version
+from prompt_templates import LORE_HEADER
+
+# Lore files and the top-level key that holds their entries
+LORE_FILES = {
+    "npcs.json": "npcs",
+    "factions.json": "factions",
+    "locations.json": "locations",
+    "arcs.json": "arcs",
+    "skills.json": "skills",
+    "powers.json": "powers",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "into", "is", "it", "its",
+    "of", "on", "or", "that", "the", "their", "this", "to", "was", "with", "while", "who", "will",
+}
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+def tokenize(text: str) -> list:
+    """Lowercased word tokens without stopwords."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+def _flatten(value) -> str:
+    if isinstance(value, dict):
+        return "; ".join(f"{key}: {_flatten(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return ", ".join(_flatten(item) for item in value)
+    return str(value)
+
+def render_snippet(kind: str, entry: dict, max_chars: int = 320) -> str:
+    """One-line lore summary of an entry, e.g. 'NPC Mayor Luthor Graves — role: ...; description: ...'."""
+    label = kind[:-1].upper() if kind == "npcs" else kind[:-1].capitalize()
+    name = entry.get("name", f"#{entry.get('id', '?')}")
+    if kind == "arcs" and "id" in entry:
+        name = f"{entry['id']}: {name}"
+    fields = "; ".join(
+        f"{key}: {_flatten(value)}" for key, value in entry.items()
+        if key not in ("name", "id") and value not in ("", [], {}, None)
+    )
+    snippet = f"{label} {name} — {fields}" if fields else f"{label} {name}"
+    if len(snippet) > max_chars:
+        snippet = snippet[:max_chars - 1].rstrip() + "…"
+    return snippet
+
+class LoreIndex:
+    """
+    BM25 index over the world data files, for attaching only the relevant lore to a prompt.
+
+    Every NPC, faction, location, arc, skill and power is one document; its name counts
+    double. Each file keeps posting lists (term -> documents containing it), so a query
+    only scores documents that share a term with it. Files come from the game_data_loader
+    cache and are re-indexed only when their version changes; corpus statistics are kept
+    per file so a refresh only re-tokenizes what changed.
+    """
+
+    def __init__(self, files: dict = None, k1: float = 1.5, b: float = 0.75):
+        self.files = files or LORE_FILES
+        self.k1 = k1
+        self.b = b
+        self._files = {}  # file name -> {"version", "docs": [(kind, name, snippet, Counter, length)], postings, df}
+        self._df = Counter()
+        self._doc_count = 0
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def _index_file(self, file_name: str, kind: str, version: int) -> dict:
+        data = load_json(file_name)
+        entries = data.get(kind, []) if isinstance(data, dict) else []
+        docs = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            name = str(entry.get("name", ""))
+            terms = Counter(tokenize(_flatten(entry)))
+            terms.update(tokenize(name))  # Names count double
+            docs.append((kind, name, render_snippet(kind, entry), terms, sum(terms.values())))
+
+        postings = {}  # term -> [(position in docs, term frequency)]
+        for position, doc in enumerate(docs):
+            for term, freq in doc[3].items():
+                postings.setdefault(term, []).append((position, freq))
+        df = Counter({term: len(posting) for term, posting in postings.items()})
+        return {"version": version, "docs": docs, "postings": postings, "df": df}
+
+    def refresh(self) -> int:
+        """Re-indexes data files that changed since the last refresh. Returns how many were re-read."""
+        changed = 0
+        versions = dict(zip(self.files, data_version(*self.files)))
+        with self._lock:
+            for file_name, kind in self.files.items():
+                current = self._files.get(file_name)
+                if current is not None and current["version"] == versions[file_name]:
+                    continue
+                if current is not None:
+                    self._df.subtract(current["df"])
+                    self._doc_count -= len(current["docs"])
+                    self._total_length -= sum(doc[4] for doc in current["docs"])
+                current = self._files[file_name] = self._index_file(file_name, kind, versions[file_name])
+                self._df.update(current["df"])
+                self._doc_count += len(current["docs"])
+                self._total_length += sum(doc[4] for doc in current["docs"])
+                changed += 1
+            if changed:
+                self._df = +self._df  # Drop terms whose count fell to zero
+        return changed
+
+    def search(self, query: str, k: int = 4, kinds=None, exclude=()) -> list:
+        """
+        Returns up to k (score, kind, name, snippet) tuples, best first.
+
+        Parameters:
+        - kinds (iterable): Restrict results to these entry types, e.g. ('npcs', 'locations').
+        - exclude (iterable): Entry names to leave out (e.g. ones the prompt already describes).
+        """
+        self.refresh()
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            if not self._doc_count:
+                return []
+            average_length = self._total_length / self._doc_count
+            idf = {
+                term: math.log(1 + (self._doc_count - self._df[term] + 0.5) / (self._df[term] + 0.5))
+                for term in terms if self._df[term]
+            }
+            results = []
+            for entry in self._files.values():
+                docs, postings = entry["docs"], entry["postings"]
+                scores = {}
+                for term, weight in idf.items():
+                    for position, freq in postings.get(term, ()):
+                        norm = self.k1 * (1 - self.b + self.b * docs[position][4] / average_length)
+                        scores[position] = scores.get(position, 0.0) + weight * freq * (self.k1 + 1) / (freq + norm)
+                for position in sorted(scores):  # Document order, so ties rank as they always have
+                    score = scores[position]
+                    kind, name, snippet = docs[position][:3]
+                    if score > 0 and not (kinds and kind not in kinds) and name not in exclude:
+                        results.append((score, kind, name, snippet))
+
+        return heapq.nlargest(k, results, key=lambda result: result[0])
+
+    def attach(self, prompt: str, query: str = None, k: int = 4, kinds=None, exclude=()) -> str:
+        """Appends the top-k lore snippets for query (default: the prompt) to prompt."""
+        results = self.search(query or prompt, k, kinds, exclude)
+        if not results:
+            return prompt
+        lore = "\n".join(f"- {snippet}" for _, _, _, snippet in results)
+        return f"{prompt}\n{LORE_HEADER}{lore}"
@@ -1,5 +1,28 @@
 import os
+from datetime import datetime
 from game_engine import GameEngine
+from autosave_worker import install_exit_handlers
+
+SAVE_PAGE = 15  # Saves listed at once; with more, the picker asks for a filter first
+
+def describe_save(entry: dict) -> str:
+    """One picker line from a save manifest entry."""
+    who = entry["character"] or "Unknown"
+    if entry.get("codename"):
+        who += f" ({entry['codename']})"
+    arc = f"Arc {entry['arc']}" if entry.get("arc") is not None else "No arc"
+    saved_at = datetime.fromtimestamp(entry["saved_at"]).strftime("%Y-%m-%d %H:%M") if entry.get("saved_at") else "?"
+    return f"{entry['file']} — {who}, Lv {entry.get('level', 1)}, {arc}, saved {saved_at}"
+
+def show_saves(game: GameEngine) -> list:
+    """Prints the most recent saves (filtered by name when there are many) and returns their entries."""
+    entries = game.saved_game_entries(limit=SAVE_PAGE + 1)
+    if len(entries) > SAVE_PAGE:
+        text = input("🔎 Many saves found. Filter by file or character name (Enter for most recent): ").strip()
+        entries = game.saved_game_entries(text=text or None, limit=SAVE_PAGE) or entries[:SAVE_PAGE]
+    for idx, entry in enumerate(entries, start=1):
+        print(f"{idx}. {describe_save(entry)}")
+    return entries
 
 def main():
     """Main game loop handling AI selection, save/load, and game interaction."""
@@ -9,35 +32,42 @@ def main():
     print("\n🌟 **Choose your Dungeon Master AI Backend:**")
     print("1️⃣ Mistral 7B (Local via Ollama Run)")
     print("2️⃣ DeepSeek Chat (Local via Ollama Run)")
+    print("3️⃣ Mock DM (Offline, no model needed)")
+    print("4️⃣ Replay DM (Offline, recorded responses)")
 
     while True:
-        choice = input("Enter the number of your choice (1 or 2): ").strip()
+        choice = input("Enter the number of your choice (1-4): ").strip()
         if choice == '1':
             dm_option = 'mistral'
             break
         elif choice == '2':
             dm_option = 'deepseek'
             break
+        elif choice == '3':
+            dm_option = 'mock'
+            break
+        elif choice == '4':
+            dm_option = 'replay'
+            break
         else:
-            print("❌ Invalid choice. Please enter 1 or 2.")
+            print("❌ Invalid choice. Please enter a number between 1-4.")
 
     # Initialize the game engine with selected AI model
     game = GameEngine(dm_option=dm_option)
+    install_exit_handlers()  # Pending autosaves are written if the process is stopped
 
     # Check for existing saves before creating a new character
-    existing_saves = game.list_saved_games()
-    if existing_saves:
+    if game.saved_game_entries(limit=1):
         print("\n💾 **Existing Saves Found:**")
-        for idx, save_file in enumerate(existing_saves, start=1):
-            print(f"{idx}. {save_file}")
-        
+        existing_saves = show_saves(game)
+
         while True:
             load_choice = input("Would you like to load a save? (Y/N): ").strip().lower()
             if load_choice == 'y':
                 try:
                     save_index = int(input(f"Enter the number of the save to load (1-{len(existing_saves)}): ")) - 1
                     if 0 <= save_index < len(existing_saves):
-                        game.load_game(existing_saves[save_index])
+                        game.load_game(existing_saves[save_index]["file"])
                         break
                     else:
                         print("❌ Invalid selection. Choose a valid save file number.")
@@ -75,22 +105,20 @@ def main():
             else:
                 print("❌ No character found. Please start a new game or load a save.")
         elif command == "3":
-            filename = input("Enter filename to save (default: savegame.json): ").strip() or "savegame.json"
+            filename = input("Enter filename to save (default: savegame.sav, .json for readable JSON): ").strip() or "savegame.sav"
             game.save_game(filename)
         elif command == "4":
-            existing_saves = game.list_saved_games()
-            if not existing_saves:
+            if not game.saved_game_entries(limit=1):
                 print("❌ No saved games available.")
             else:
                 print("\n💾 **Available Saves:**")
-                for idx, save in enumerate(existing_saves, start=1):
-                    print(f"{idx}. {save}")
-                
+                existing_saves = show_saves(game)
+
                 while True:
                     try:
                         save_index = int(input(f"Enter the number of the save to load (1-{len(existing_saves)}): ")) - 1
                         if 0 <= save_index < len(existing_saves):
-                            game.load_game(existing_saves[save_index])
+                            game.load_game(existing_saves[save_index]["file"])
                             break
                         else:
                             print("❌ Invalid selection. Choose a valid save file number.")
@@ -114,6 +142,7 @@ def main():
             confirm_exit = input("\n🚪 Are you sure you want to quit? (Y/N): ").strip().lower()
             if confirm_exit == 'y':
                 print("\n🚪 **Exiting the game. Goodbye!**")
+                game.shutdown()
                 break
         else:
             print("❌ Invalid command. Please enter a number between 1-6.")
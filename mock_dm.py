@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from dm_resilience import DMTimeoutError, FixtureMissing
+
+FIXTURES_PATH = os.path.join("fixtures", "dm_fixtures.jsonl")
+
+# Latency shapes for the mock backend: time to first token, generation speed and reply length.
+# "jitter" is the +/- fraction applied to each, drawn from a per-prompt seeded RNG.
+MOCK_PROFILES = {
+    "instant": {"ttft_seconds": 0.0, "tokens_per_second": 0, "output_tokens": 120, "jitter": 0.0},
+    "local_7b": {"ttft_seconds": 0.8, "tokens_per_second": 25, "output_tokens": 180, "jitter": 0.2},
+    "local_cpu": {"ttft_seconds": 3.0, "tokens_per_second": 6, "output_tokens": 180, "jitter": 0.3},
+    "hosted_api": {"ttft_seconds": 0.4, "tokens_per_second": 60, "output_tokens": 220, "jitter": 0.1},
+}
+
+MOCK_WORDS = (
+    "the city hums with restless energy as neon light spills across rain slick streets "
+    "a distant siren wails while shadows gather above the rooftops and a stranger watches "
+    "from the alley your powers stir beneath your skin ready for whatever comes next"
+).split()
+
+# dm_interface log layout: each record starts with a timestamp; a preamble definition line
+# (written once per log file) comes right before the first record that references it.
+# Older logs have no backend in the response line and may carry the emoji escaped ("\U0001f539").
+_LOG_PIECE = re.compile(r"^(?=\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} [A-Z]+: |⟨preamble:[0-9a-f]{10}⟩ = )", re.MULTILINE)
+_RECORD = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} [A-Z]+: (.*)$", re.DOTALL)
+_PREAMBLE_DEF = re.compile(r"^(⟨preamble:[0-9a-f]{10}⟩) = (.*)$", re.DOTALL)
+_SENT = re.compile(r"^(?:(?:🔹|\\U0001f539) )?(?:Sending|Streaming) prompt to DM \((\w+)\): (.*)$", re.DOTALL)
+_RESPONSE = re.compile(r"^(?:(?:📝|\\U0001f4dd) )?DM [Rr]esponse(?: \((\w+)\))?: (.*)$", re.DOTALL)
+
+def _prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+def _split_chunks(text: str) -> list:
+    """Splits text into word-sized chunks that join back to exactly the original text."""
+    return re.findall(r"\s*\S+|\s+$", text)
+
+class MockDMBackend:
+    """
+    Offline stand-in for an LLM backend.
+
+    Replies are generated from a seeded RNG keyed on the prompt, so the same prompt always
+    yields the same text, and are paced to the latency profile (time to first token, then
+    tokens per second). A profile slower than the caller's timeout raises DMTimeoutError
+    like a stalled real backend would.
+    """
+
+    def __init__(self, profile="local_7b", seed: int = 0):
+        self.profile = dict(MOCK_PROFILES[profile]) if isinstance(profile, str) else dict(profile)
+        self.seed = seed
+
+    def _rng(self, prompt: str) -> random.Random:
+        return random.Random(f"{self.seed}:{_prompt_key(prompt)}")
+
+    def _vary(self, rng: random.Random, value: float) -> float:
+        jitter = self.profile.get("jitter", 0.0)
+        return value * rng.uniform(1 - jitter, 1 + jitter) if jitter else value
+
+    def compose(self, prompt: str) -> str:
+        """The deterministic reply for prompt."""
+        rng = self._rng(prompt)
+        length = max(1, int(self._vary(rng, self.profile.get("output_tokens", 120))))
+        words = [rng.choice(MOCK_WORDS) for _ in range(length)]
+        return " ".join(words).capitalize() + "."
+
+    def pace(self, prompt: str, chunks: list, timeout: float = None):
+        """Yields chunks on the profile's schedule, raising DMTimeoutError past timeout."""
+        rng = self._rng(f"pace:{prompt}")
+        started = time.monotonic()
+        deadline = started + timeout if timeout else None
+        ttft = self._vary(rng, self.profile.get("ttft_seconds", 0.0))
+        rate = self.profile.get("tokens_per_second", 0)
+        interval = self._vary(rng, 1.0 / rate) if rate else 0.0
+
+        due = started + ttft
+        for chunk in chunks:
+            wait = due - time.monotonic()
+            if deadline is not None and due > deadline:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                raise DMTimeoutError(f"Mock DM exceeded its {timeout:.1f}s timeout")
+            if wait > 0:
+                time.sleep(wait)
+            yield chunk
+            due += interval
+
+    def generate(self, prompt: str, timeout: float = None) -> str:
+        return "".join(self.stream(prompt, timeout))
+
+    def stream(self, prompt: str, timeout: float = None):
+        return self.pace(prompt, _split_chunks(self.compose(prompt)), timeout)
+
+class DMFixtures:
+    """
+    Recorded prompt/response pairs in a JSON-lines file, keyed by the SHA-256 of the prompt.
+
+    In record mode dm_interface appends every successful reply; in replay mode the "replay"
+    backend returns the stored text unchanged. Later recordings of the same prompt win.
+    """
+
+    def __init__(self, path: str = FIXTURES_PATH):
+        self.path = path
+        self._entries = None  # key -> entry, loaded on first use
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries[entry["key"]] = entry
+        return self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def get(self, prompt: str):
+        """Returns the recorded response for prompt, or None."""
+        with self._lock:
+            entry = self._load().get(_prompt_key(prompt))
+        return entry["response"] if entry else None
+
+    def record(self, prompt: str, response: str, backend: str = None):
+        """Appends a prompt/response pair to the fixture file."""
+        entry = {"key": _prompt_key(prompt), "backend": backend, "prompt": prompt, "response": response}
+        with self._lock:
+            self._load()[entry["key"]] = entry
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def import_log(self, log_path: str, skip=()) -> int:
+        """
+        Records the prompt/response pairs found in a dm_interface log (gzipped backups are
+        not read). Prompts are paired with the next response from the same backend; in older
+        logs, whose responses name no backend, a response answers the latest prompt and earlier
+        unanswered ones are dropped. Responses in `skip` (e.g. canned error replies) are
+        ignored. Returns the count added.
+        """
+        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+
+        preambles = {}
+        pending = {}  # backend -> prompts awaiting a response, oldest first
+        current = None  # Backend of the latest prompt; answers responses that don't name one
+        added = 0
+        for piece in _LOG_PIECE.split(text):
+            piece = piece.rstrip("\n")
+            definition = _PREAMBLE_DEF.match(piece)
+            if definition:
+                preambles[definition.group(1)] = definition.group(2)
+                continue
+            record = _RECORD.match(piece)
+            if not record:
+                continue
+            message = record.group(1)
+            for ref, preamble in preambles.items():
+                message = message.replace(ref, preamble)
+
+            sent = _SENT.match(message)
+            if sent:
+                current = sent.group(1)
+                pending.setdefault(current, []).append(sent.group(2))
+                continue
+            reply = _RESPONSE.match(message)
+            if not reply:
+                continue
+            backend, response = reply.groups()
+            if backend is None:
+                backend, queue = current, pending.get(current)
+                if not queue:
+                    continue
+                prompt = queue.pop()
+                queue.clear()
+            else:
+                # Fallback replies are logged under the backend that answered, not the one asked
+                queue = pending.get(backend) or next((q for q in pending.values() if q), None)
+                if not queue:
+                    continue
+                prompt = queue.pop(0)
+            if response and response not in skip:
+                self.record(prompt, response, backend)
+                added += 1
+        return added
+
+class ReplayDMBackend:
+    """Serves recorded responses byte-for-byte, optionally paced by a mock latency profile."""
+
+    def __init__(self, fixtures: DMFixtures, profile="instant"):
+        self.fixtures = fixtures
+        self.pacer = MockDMBackend(profile)
+
+    def _lookup(self, prompt: str) -> str:
+        response = self.fixtures.get(prompt)
+        if response is None:
+            raise FixtureMissing(f"No recorded response for prompt {_prompt_key(prompt)[:12]}")
+        return response
+
+    def generate(self, prompt: str, timeout: float = None) -> str:
+        return "".join(self.stream(prompt, timeout))
+
+    def stream(self, prompt: str, timeout: float = None):
+        return self.pacer.pace(prompt, _split_chunks(self._lookup(prompt)), timeout)
+
+if __name__ == "__main__":
+    # Usage: python mock_dm.py [log_file] [fixtures_file]
+    log_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("logs", "dm_interface.log")
+    fixtures_path = sys.argv[2] if len(sys.argv) > 2 else FIXTURES_PATH
+    from dm_interface import ERROR_RESPONSES, INVALID_OPTION_RESPONSES
+    count = DMFixtures(fixtures_path).import_log(log_path, skip=ERROR_RESPONSES | INVALID_OPTION_RESPONSES)
+    print(f"📼 Recorded {count} prompt/response pairs into {fixtures_path}")
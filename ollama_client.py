@@ -0,0 +1,208 @@
+import http.client
+import json
+import queue
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_OLLAMA_HOST = "http://127.0.0.1:11434"
+
+# Errors that mean a pooled keep-alive socket was closed by the server while idle.
+# The request is retried once on a fresh connection when one of these is raised.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+class OllamaError(Exception):
+    """Raised when the Ollama server rejects a request or returns an unreadable reply."""
+
+class OllamaClient:
+    """
+    Long-lived client for the Ollama HTTP API.
+
+    Connections are kept open (HTTP keep-alive) and handed out from a small pool, so a DM turn
+    costs one request on an already-open socket instead of a fresh `ollama run` process.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_HOST, pool_size: int = 4, timeout: float = 300.0):
+        if "://" not in base_url:
+            base_url = f"http://{base_url}"  # OLLAMA_HOST is often given as host:port
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.scheme = parts.scheme
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 11434)
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._closed = False
+
+    def _new_connection(self):
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self):
+        """Returns an idle pooled connection, or opens a new one if the pool is empty."""
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, connection):
+        """Returns a connection to the pool, closing it if the pool is full or the client is closed."""
+        if self._closed:
+            connection.close()
+            return
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    @staticmethod
+    def _set_timeout(connection, timeout):
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+
+    def _request(self, method: str, path: str, payload: dict = None, timeout: float = None):
+        """Sends a request and returns (connection, response) with the body still unread."""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        timeout = timeout or self.timeout
+
+        connection, reused = self._acquire()
+        self._set_timeout(connection, timeout)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+        except STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            connection = self._new_connection()  # Idle socket was dropped; retry once on a fresh one.
+            self._set_timeout(connection, timeout)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+            except Exception:
+                connection.close()
+                raise
+        except Exception:
+            connection.close()
+            raise
+        return connection, response
+
+    def _request_json(self, method: str, path: str, payload: dict = None, timeout: float = None) -> dict:
+        connection, response = self._request(method, path, payload, timeout)
+        try:
+            raw = response.read()
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+
+        if response.status != 200:
+            raise OllamaError(f"Ollama returned HTTP {response.status}: {raw.decode('utf-8', 'replace')[:200]}")
+        try:
+            return json.loads(raw.decode("utf-8"))
+        except ValueError as e:
+            raise OllamaError(f"Invalid JSON from Ollama: {e}") from e
+
+    def generate(self, model: str, prompt: str, options: dict = None, keep_alive=None, timeout: float = None,
+                 **extra) -> dict:
+        """
+        Runs a single non-streaming completion via /api/generate and returns the decoded reply.
+
+        Parameters:
+        - model (str): Ollama model tag, e.g. 'mistral:latest'.
+        - prompt (str): The full prompt text.
+        - options (dict): Sampling options such as temperature and num_predict.
+        - keep_alive (str|int): How long Ollama keeps the model loaded after this call.
+        - timeout (float): Socket timeout for this call (defaults to the client's timeout).
+        """
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if options:
+            payload["options"] = options
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        payload.update(extra)
+        return self._request_json("POST", "/api/generate", payload, timeout)
+
+    def stream_generate(self, model: str, prompt: str, options: dict = None, keep_alive=None, timeout: float = None,
+                        **extra):
+        """
+        Streams a completion via /api/generate, yielding each decoded NDJSON message as it arrives.
+
+        Closing the generator early (e.g. on Ctrl-C) drops the connection, which makes Ollama
+        abandon the generation instead of finishing it in the background. `timeout` bounds
+        the wait for each chunk, so a stalled generation fails instead of hanging.
+        """
+        payload = {"model": model, "prompt": prompt, "stream": True}
+        if options:
+            payload["options"] = options
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        payload.update(extra)
+
+        connection, response = self._request("POST", "/api/generate", payload, timeout)
+        finished = False
+        try:
+            if response.status != 200:
+                raw = response.read()
+                finished = True
+                raise OllamaError(f"Ollama returned HTTP {response.status}: {raw.decode('utf-8', 'replace')[:200]}")
+
+            for line in response:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line.decode("utf-8"))
+                except ValueError as e:
+                    raise OllamaError(f"Invalid JSON from Ollama: {e}") from e
+                if "error" in message:
+                    raise OllamaError(f"Ollama error: {message['error']}")
+                yield message
+                if message.get("done"):
+                    break
+            response.read()  # Drain the chunked terminator so the socket can be reused
+            finished = True
+        finally:
+            if finished and not response.will_close:
+                self._release(connection)
+            else:
+                connection.close()
+
+    def close(self):
+        """Closes every pooled connection."""
+        self._closed = True
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+# 📌 Shared clients, one per Ollama host, so every DM call reuses the same pool
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_client(base_url: str = DEFAULT_OLLAMA_HOST, **kwargs) -> OllamaClient:
+    """Returns the shared client for an Ollama host, creating it on first use."""
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(base_url)
+        if client is None or client._closed:
+            client = OllamaClient(base_url, **kwargs)
+            _CLIENTS[base_url] = client
+        return client
+
+def close_all_clients():
+    """Closes every shared client (e.g. on game exit)."""
+    with _CLIENTS_LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
@@ -0,0 +1,138 @@
+import math
+from string import Formatter
+
+# Average characters per token for each backend's tokenizer on English prose
+CHARS_PER_TOKEN = {
+    "openai": 4.0,
+    "mistral": 3.5,
+    "deepseek": 3.8,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+def estimate_tokens(text: str, backend: str = None) -> int:
+    """
+    Offline token estimate for a backend. Multi-byte characters (emoji, accents) are
+    charged extra, since tokenizers usually split them into several tokens.
+    """
+    if not text:
+        return 0
+    ratio = CHARS_PER_TOKEN.get(backend, DEFAULT_CHARS_PER_TOKEN)
+    extra_bytes = len(text.encode("utf-8")) - len(text)
+    return math.ceil(len(text) / ratio + extra_bytes / 2)
+
+class Section:
+    """
+    One part of a prompt template.
+
+    Parameters:
+    - text (str): Format string using plain `{field}` placeholders.
+    - priority (int): Higher is more important; the lowest-priority sections are trimmed first.
+    - required (bool): Required sections are never trimmed.
+    - list_field (str): Field holding a list; items are dropped from the end before the section goes.
+    - joiner (str): Separator for list items.
+    - empty (str): Text used for an empty list; None drops the section instead.
+    """
+
+    def __init__(self, name: str, text: str, priority: int = 0, required: bool = False, list_field: str = None,
+                 joiner: str = ", ", empty: str = None):
+        self.name = name
+        self.priority = priority
+        self.required = required
+        self.list_field = list_field
+        self.joiner = joiner
+        self.empty = empty
+        self.parts = []  # (literal, field) pairs, parsed once
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if spec or conversion:
+                raise ValueError(f"Section '{name}' only supports plain {{field}} placeholders")
+            self.parts.append((literal, field))
+
+    def render(self, values: dict, items: list = None):
+        """Returns the section text, or None if it has nothing to show."""
+        if self.list_field is not None:
+            items = values.get(self.list_field, []) if items is None else items
+            if not items and self.empty is None:
+                return None
+            values = dict(values, **{self.list_field: self.joiner.join(items) if items else self.empty})
+        return "".join(literal + (str(values[field]) if field is not None else "") for literal, field in self.parts)
+
+class PromptTemplate:
+    """
+    A scene prompt made of prioritized sections, parsed once at import time.
+
+    `render` fills the sections and, when the result is over its token budget, trims the
+    least important optional sections first: list sections lose items from the end, other
+    sections are dropped. Required sections are always kept.
+    """
+
+    def __init__(self, name: str, sections: list, separator: str = "\n"):
+        self.name = name
+        self.sections = sections
+        self.separator = separator
+        self._trim_order = sorted((s for s in sections if not s.required), key=lambda s: s.priority)
+
+    def _join(self, rendered: dict) -> str:
+        return self.separator.join(rendered[s.name] for s in self.sections if rendered.get(s.name) is not None)
+
+    def render(self, budget: int = None, backend: str = None, **values) -> str:
+        """
+        Fills the template. With a token budget, trims optional sections until it fits
+        (as estimated for `backend`).
+        """
+        rendered = {section.name: section.render(values) for section in self.sections}
+        prompt = self._join(rendered)
+        if budget is None or estimate_tokens(prompt, backend) <= budget:
+            return prompt
+
+        for section in self._trim_order:
+            if rendered[section.name] is None:
+                continue
+            if section.list_field is not None:
+                items = list(values.get(section.list_field, []))
+                while items:
+                    items.pop()
+                    rendered[section.name] = section.render(values, items) if items else None
+                    prompt = self._join(rendered)
+                    if estimate_tokens(prompt, backend) <= budget:
+                        return prompt
+            rendered[section.name] = None
+            prompt = self._join(rendered)
+            if estimate_tokens(prompt, backend) <= budget:
+                return prompt
+        return prompt
+
+LORE_HEADER = "\n📚 **Relevant Lore (use only these facts):**\n"
+
+# 📜 Scene Templates
+INTRO_TEMPLATE = PromptTemplate("intro_scene", [
+    Section("setup", "Setting up the introduction for {name}, a new metahuman in Paragon City.", 10, required=True),
+    Section("arc", "Keep responses within the pre-defined story arc:\n"
+                   "Arc 1: 'The Awakening' – A mysterious power surge grants metahuman abilities.", 8),
+    Section("task", "Describe the character awakening in the city and their first impressions.", 10, required=True),
+    Section("lore", LORE_HEADER + "- {lore}", 1, list_field="lore", joiner="\n- "),
+])
+
+LOCATION_TEMPLATE = PromptTemplate("enter_location", [
+    Section("task", "Describe {name} arriving at {location}.\n"
+                    "Do NOT introduce new NPCs or factions. Keep the scene within:", 10, required=True),
+    Section("description", "🌍 **Location Description:** {description}", 9, required=True),
+    Section("npcs", "🎭 **Existing NPCs:** {npcs}", 5, list_field="npcs", empty=""),
+    Section("lore", LORE_HEADER + "- {lore}", 1, list_field="lore", joiner="\n- "),
+])
+
+ARC_EVENTS_TEMPLATE = PromptTemplate("trigger_arc_events", [
+    Section("title", "📖 **Arc {arc_number}: '{arc_name}'**\nStay within the pre-defined plotline:", 10, required=True),
+    Section("storyline", "📝 **Storyline:** {description}", 9, required=True),
+    Section("events", "🔹 **Key Events:** {events}", 6, list_field="events"),
+    Section("task", "🎭 Describe how {name} gets involved in the first event.", 10, required=True),
+    Section("lore", LORE_HEADER + "- {lore}", 1, list_field="lore", joiner="\n- "),
+])
+
+ARC_START_TEMPLATE = PromptTemplate("start_campaign_arc", [
+    Section("title", "📖 **Begin Arc {arc_number}: '{arc_name}'**", 10, required=True),
+    Section("storyline", "🔹 **Storyline:** {description}", 9, required=True),
+    Section("npcs", "🎭 **NPCs:** {npcs}", 5, list_field="npcs", empty="None"),
+    Section("locations", "🌍 **Locations:** {locations}", 4, list_field="locations", empty="None"),
+    Section("task", "Describe how {name} enters this arc while staying within known lore.", 10, required=True),
+    Section("lore", LORE_HEADER + "- {lore}", 1, list_field="lore", joiner="\n- "),
+])
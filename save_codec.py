@@ -0,0 +1,194 @@
+import dataclasses
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from character import Character, Power
+from game_data_loader import replace_keeping_mode
+from save_journal import load_save
+
+# 📦 Binary Save Format
+#   header:  magic (8s) | format version (H) | schema version (H) | schema hash (8s) | CRC-32 (I) | JSON length (Q)
+#   body:    zlib-compressed compact JSON of the save data
+MAGIC = b"TTRPGSV\x00"
+FORMAT_VERSION = 1
+SCHEMA_VERSION = 1  # Bump when the save layout changes, and register a migration from the old version
+SAVE_EXTENSION = ".sav"
+HEADER = struct.Struct("<8sHH8sIQ")
+CHUNK_SIZE = 64 * 1024
+COMPRESSION_LEVEL = 6
+
+class SaveFormatError(ValueError):
+    """A save that cannot be decoded: not a save, corrupt, or from a newer version of the game."""
+
+def schema_hash() -> bytes:
+    """Fingerprint of the Character/Power fields; changes whenever those dataclasses do."""
+    layout = ";".join(
+        f"{cls.__name__}.{field.name}:{getattr(field.type, '__name__', field.type)}"
+        for cls in (Character, Power) for field in dataclasses.fields(cls)
+    )
+    return hashlib.sha256(layout.encode("utf-8")).digest()[:8]
+
+# 📌 Migrations
+MIGRATIONS = {}  # schema version -> function upgrading save data from that version to the next
+
+def migration(from_version: int):
+    """Registers a function that upgrades save data from from_version to from_version + 1."""
+    def register(upgrade):
+        MIGRATIONS[from_version] = upgrade
+        return upgrade
+    return register
+
+def migrate(data: dict) -> dict:
+    """Upgrades save data of any older schema version to SCHEMA_VERSION."""
+    version = data.get("schema_version", 0)
+    if version > SCHEMA_VERSION:
+        raise SaveFormatError(f"Save schema version {version} is newer than this game ({SCHEMA_VERSION}).")
+    while version < SCHEMA_VERSION:
+        if version not in MIGRATIONS:
+            raise SaveFormatError(f"No migration registered from save schema version {version}.")
+        data = MIGRATIONS[version](data)
+        version += 1
+        data["schema_version"] = version
+    return data
+
+@migration(0)
+def _fill_character_defaults(data: dict) -> dict:
+    """Unversioned JSON saves: fill in fields that older builds didn't write."""
+    character = data.get("player_character")
+    if isinstance(character, dict):
+        character.setdefault("temp_hp", 0)
+        character.setdefault("level", 1)
+        character.setdefault("proficiency_bonus", 2)
+        character.setdefault("backstory", "")
+        for power in character.get("powers", []):
+            power.setdefault("effect", {})
+    data.setdefault("story_state", {"arc": None, "events_completed": []})
+    return data
+
+# 📌 Encode / Decode
+def encode(data: dict, f):
+    """
+    Streams save data to a seekable binary file: the JSON is compressed chunk by chunk
+    as it is serialized, then the header is filled in with its checksum and length.
+    """
+    start = f.tell()
+    f.write(b"\0" * HEADER.size)
+    compressor = zlib.compressobj(COMPRESSION_LEVEL)
+    crc, length, buffer = 0, 0, []
+    buffered = 0
+    for piece in json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).iterencode(data):
+        raw = piece.encode("utf-8")
+        crc = zlib.crc32(raw, crc)
+        length += len(raw)
+        buffer.append(raw)
+        buffered += len(raw)
+        if buffered >= CHUNK_SIZE:
+            f.write(compressor.compress(b"".join(buffer)))
+            buffer, buffered = [], 0
+    f.write(compressor.compress(b"".join(buffer)))
+    f.write(compressor.flush())
+
+    end = f.tell()
+    f.seek(start)
+    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, data.get("schema_version", SCHEMA_VERSION), schema_hash(), crc, length))
+    f.seek(end)
+
+def read_header(f) -> dict:
+    raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise SaveFormatError("Save file is truncated.")
+    magic, format_version, schema_version, fingerprint, crc, length = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise SaveFormatError("Not a binary save file.")
+    if format_version > FORMAT_VERSION:
+        raise SaveFormatError(f"Save format version {format_version} is newer than this game ({FORMAT_VERSION}).")
+    return {"format_version": format_version, "schema_version": schema_version, "schema_hash": fingerprint,
+            "crc": crc, "length": length}
+
+def decode(f) -> dict:
+    """Streams a save back in, verifying its checksum, and migrates it to the current schema."""
+    header = read_header(f)
+    decompressor = zlib.decompressobj()
+    crc, parts = 0, []
+    try:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            raw = decompressor.decompress(chunk)
+            crc = zlib.crc32(raw, crc)
+            parts.append(raw)
+        raw = decompressor.flush()
+    except zlib.error as e:
+        raise SaveFormatError(f"Save file is corrupt ({e}).") from e
+    crc = zlib.crc32(raw, crc)
+    parts.append(raw)
+
+    payload = b"".join(parts)
+    if len(payload) != header["length"] or crc != header["crc"]:
+        raise SaveFormatError("Save file is corrupt (checksum mismatch).")
+    data = json.loads(payload.decode("utf-8"))
+    data.setdefault("schema_version", header["schema_version"])
+    if header["schema_version"] == SCHEMA_VERSION and header["schema_hash"] != schema_hash():
+        print("⚠️ Character/Power fields changed since this save was written without a schema version bump; "
+              "register a migration in save_codec if loading fails.")
+    return migrate(data)
+
+# 💾 Files
+def write_save(path: str, data: dict):
+    """Encodes data to path atomically (temp file + rename)."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            encode(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        replace_keeping_mode(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def is_binary_save(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def read_save(path: str):
+    """
+    Loads any save: binary, or JSON with its delta journal (see save_journal). The data is
+    migrated to the current schema. Returns None if the file doesn't exist.
+    """
+    if is_binary_save(path):
+        with open(path, "rb") as f:
+            return decode(f)
+    data = load_save(path)
+    return migrate(data) if isinstance(data, dict) else data
+
+def export_json(path: str, json_path: str):
+    """Writes a save out as readable JSON (for debugging)."""
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(read_save(path), f, indent=4)
+
+def import_json(json_path: str, path: str):
+    """Encodes a JSON save (e.g. an edited export) back into a binary save."""
+    write_save(path, read_save(json_path))
+
+if __name__ == "__main__":
+    # python save_codec.py export saves/savegame.sav savegame.json
+    # python save_codec.py import savegame.json saves/savegame.sav
+    if len(sys.argv) != 4 or sys.argv[1] not in ("export", "import"):
+        print("Usage: python save_codec.py export <save.sav> <out.json> | import <in.json> <save.sav>")
+        sys.exit(1)
+    (export_json if sys.argv[1] == "export" else import_json)(sys.argv[2], sys.argv[3])
+    print(f"✅ {sys.argv[1].capitalize()}ed {sys.argv[2]} -> {sys.argv[3]}")
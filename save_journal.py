@@ -0,0 +1,156 @@
+import copy
+import json
+import os
+import threading
+from game_data_loader import write_json_atomic
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+COMPACT_BYTES = 64 * 1024  # Journal size that triggers folding it into a new snapshot
+SEQ_KEY = "journal_seq"  # Snapshot field: last journal entry already folded in
+
+def journal_path(save_path: str) -> str:
+    """saves/autosave.json -> saves/autosave.journal.jsonl"""
+    return os.path.splitext(save_path)[0] + JOURNAL_SUFFIX
+
+# 📌 Deltas
+def diff(old, new, path=()) -> list:
+    """
+    Operations turning old into new: ["set", path, value], ["del", path] and
+    ["append", path, items] for lists that only grew (e.g. story events).
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["set", [*path, key], value])
+            else:
+                ops.extend(diff(old[key], value, (*path, key)))
+        ops.extend(["del", [*path, key]] for key in old if key not in new)
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        return [["append", list(path), new[len(old):]]]
+    return [] if old == new else [["set", list(path), new]]
+
+def apply(state, ops):
+    """Applies diff() operations to state in place; returns the (possibly replaced) state."""
+    for op in ops:
+        kind, path = op[0], op[1]
+        if not path:
+            state = op[2] if kind == "set" else state + op[2]
+            continue
+        parent = state
+        for key in path[:-1]:
+            parent = parent[key]
+        if kind == "set":
+            parent[path[-1]] = op[2]
+        elif kind == "del":
+            parent.pop(path[-1], None)
+        elif kind == "append":
+            parent[path[-1]].extend(op[2])
+    return state
+
+def _replay(save_path: str):
+    """(state, last seq, bytes of intact journal) for a save, or (None, 0, 0) if it doesn't exist."""
+    if not os.path.exists(save_path):
+        return None, 0, 0
+    with open(save_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    seq = state.pop(SEQ_KEY, 0)
+
+    intact = 0
+    path = journal_path(save_path)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Torn last line from a crash mid-append; everything before it is intact
+                if not line.endswith(b"\n"):
+                    break
+                if entry["seq"] > seq:  # Entries at or below seq were already folded into the snapshot
+                    state = apply(state, entry["ops"])
+                    seq = entry["seq"]
+                intact += len(line)
+    return state, seq, intact
+
+def load_save(save_path: str):
+    """Reads a save file and replays its journal if it has one. Returns None if the save doesn't exist."""
+    return _replay(save_path)[0]
+
+class SaveJournal:
+    """
+    A save file written as a snapshot plus an append-only journal of deltas.
+
+    `append` writes only what changed since the previous call (one JSON line), so
+    frequent autosaves cost proportional to the change rather than the game size. Once
+    the journal passes `compact_bytes`, it is folded into a new snapshot (written
+    atomically) and truncated. `load_save` replays snapshot + journal; a plain JSON save
+    without a journal loads the same way.
+    """
+
+    def __init__(self, save_path: str, compact_bytes: int = COMPACT_BYTES):
+        self.save_path = save_path
+        self.path = journal_path(save_path)
+        self.compact_bytes = compact_bytes
+        self._state = None  # Mirror of what snapshot + journal hold
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def _sync(self):
+        """Loads the on-disk state the first time it is needed."""
+        if self._state is not None:
+            return
+        state, seq, intact = _replay(self.save_path)
+        if state is None:
+            return
+        self._state, self._seq = state, seq
+        if os.path.exists(self.path) and os.path.getsize(self.path) > intact:
+            with open(self.path, "r+b") as f:
+                f.truncate(intact)  # Drop a torn line so new entries don't get glued onto it
+
+    def append(self, data: dict) -> int:
+        """Journals the changes since the last save. Returns the number of bytes written."""
+        data = json.loads(json.dumps(data))  # Normalized (string keys, lists) and detached from live objects
+        with self._lock:
+            self._sync()
+            if self._state is None:
+                self._write_snapshot(data)
+                return os.path.getsize(self.save_path)
+
+            ops = diff(self._state, data)
+            if not ops:
+                return 0
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, "ops": ops}, separators=(",", ":")) + "\n"
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._state = data
+
+            if os.path.getsize(self.path) >= self.compact_bytes:
+                self._write_snapshot(data)
+            return len(line.encode("utf-8"))
+
+    def snapshot(self, data: dict):
+        """Writes a full snapshot and starts an empty journal (used for explicit saves and compaction)."""
+        data = json.loads(json.dumps(data))
+        with self._lock:
+            self._sync()
+            self._write_snapshot(data)
+
+    def compact(self):
+        """Folds the journal into a new snapshot now."""
+        with self._lock:
+            self._sync()
+            if self._state is not None:
+                self._write_snapshot(self._state)
+
+    def _write_snapshot(self, data: dict):
+        # The snapshot records the last folded entry first, so a crash before the journal is
+        # truncated just makes load_save skip entries it already contains
+        write_json_atomic(self.save_path, {**data, SEQ_KEY: self._seq})
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+        self._state = copy.deepcopy(data)
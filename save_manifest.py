@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import threading
+from save_journal import JOURNAL_SUFFIX, journal_path
+from save_codec import SAVE_EXTENSION, read_save
+
+MANIFEST_FILE = "manifest.jsonl"
+SORT_KEYS = ("saved_at", "character", "level", "arc", "size", "file")
+
+def checksum(save_data: dict) -> str:
+    """Content hash of a save's state (independent of formatting and of snapshot vs. journal)."""
+    canonical = json.dumps(save_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+def _stamp(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+class SaveManifest:
+    """
+    Index of the saves in a directory, so the save picker never opens the saves themselves.
+
+    Each entry holds file, character, codename, level, arc, saved_at, size and checksum.
+    The manifest is an append-only JSON-lines file of upserts and removals, compacted once
+    stale lines outnumber live entries. `save_game` records every write; saves added or
+    changed by other means are picked up when the directory's mtime changes, re-reading
+    only files whose mtime or size differ. A missing or corrupt manifest is rebuilt from disk.
+    """
+
+    def __init__(self, save_dir: str):
+        self.save_dir = save_dir
+        self.path = os.path.join(save_dir, MANIFEST_FILE)
+        self._entries = None  # file -> entry
+        self._ignored = {}  # file -> stamp of JSON files that aren't saves (e.g. session_stats.json)
+        self._dir_stamp = None
+        self._lines = 0
+        self._lock = threading.RLock()
+
+    # 📌 Manifest File
+    def _read(self) -> bool:
+        self._entries, self._ignored, self._dir_stamp, self._lines = {}, {}, None, 0
+        torn = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = True  # Crash mid-append; keep what came before
+                        break
+                    self._fold(record)
+                    self._lines += 1
+        except (OSError, UnicodeDecodeError):
+            return False
+        if torn:
+            self._compact()  # Rewrite cleanly so new lines don't get glued onto the torn one
+        return True
+
+    def _fold(self, record: dict):
+        op, file = record.get("op"), record.get("file")
+        if op == "put":
+            self._entries[file] = record["entry"]
+            self._ignored.pop(file, None)
+        elif op == "ignore":
+            self._ignored[file] = record["stamp"]
+            self._entries.pop(file, None)
+        elif op == "remove":
+            self._entries.pop(file, None)
+            self._ignored.pop(file, None)
+        elif op == "dir":
+            self._dir_stamp = record["stamp"]
+
+    def _append(self, records: list):
+        if not records:
+            return
+        os.makedirs(self.save_dir, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._lines += len(records)
+        if self._lines > 2 * (len(self._entries) + len(self._ignored)) + 16:
+            self._compact()
+
+    def _compact(self):
+        records = [{"op": "put", "file": file, "entry": entry} for file, entry in self._entries.items()]
+        records += [{"op": "ignore", "file": file, "stamp": stamp} for file, stamp in self._ignored.items()]
+        records.append({"op": "dir", "stamp": self._dir_stamp})
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        os.replace(temp_path, self.path)
+        self._lines = len(records)
+
+    def _ensure(self):
+        """Loads the manifest, rebuilding it if it is missing, and reconciles it if the directory changed."""
+        if self._entries is None and not self._read():
+            self.rebuild()
+            return
+        if _stamp(self.save_dir) != self._dir_stamp:
+            self._reconcile()
+
+    # 📌 Entries
+    def _entry(self, file: str, save_data: dict) -> dict:
+        character = save_data.get("player_character") or {}
+        story_state = save_data.get("story_state") or {}
+        path = os.path.join(self.save_dir, file)
+        stamp = _stamp(path) or [0, 0]
+        journal = _stamp(journal_path(path))
+        return {
+            "file": file,
+            "character": character.get("name"),
+            "codename": character.get("codename"),
+            "level": character.get("level", 1),
+            "arc": story_state.get("arc"),
+            "saved_at": max(stamp[0], journal[0] if journal else 0) / 1e9,
+            "size": stamp[1] + (journal[1] if journal else 0),
+            "checksum": checksum(save_data),
+            "stamp": stamp,  # Snapshot mtime/size when indexed, to spot outside edits
+        }
+
+    def _scan(self):
+        """(file, stamp) for every JSON or binary save file in the save directory."""
+        try:
+            names = os.listdir(self.save_dir)
+        except OSError:
+            return []
+        return [
+            (name, _stamp(os.path.join(self.save_dir, name))) for name in names
+            if name.endswith((".json", SAVE_EXTENSION)) and not name.endswith(JOURNAL_SUFFIX)
+        ]
+
+    def _index(self, file: str, stamp) -> dict:
+        try:
+            data = read_save(os.path.join(self.save_dir, file))
+        except (OSError, ValueError):
+            data = None
+        if isinstance(data, dict) and "player_character" in data:
+            return {"op": "put", "file": file, "entry": self._entry(file, data)}
+        return {"op": "ignore", "file": file, "stamp": stamp}
+
+    def _reconcile(self):
+        records = []
+        seen = set()
+        for file, stamp in self._scan():
+            seen.add(file)
+            known = self._entries.get(file, {}).get("stamp") or self._ignored.get(file)
+            if known != stamp:
+                records.append(self._index(file, stamp))
+        records += [{"op": "remove", "file": file} for file in [*self._entries, *self._ignored] if file not in seen]
+        records.append({"op": "dir", "stamp": _stamp(self.save_dir)})
+        for record in records:
+            self._fold(record)
+        self._append(records)
+
+    def rebuild(self):
+        """Re-indexes every save on disk (used when the manifest is missing)."""
+        with self._lock:
+            self._entries, self._ignored, self._dir_stamp, self._lines = {}, {}, None, 0
+            for file, stamp in self._scan():
+                self._fold(self._index(file, stamp))
+            self._dir_stamp = _stamp(self.save_dir)
+            if os.path.isdir(self.save_dir):
+                self._compact()
+
+    def record(self, file: str, save_data: dict):
+        """Indexes a save that was just written."""
+        with self._lock:
+            if self._entries is None and not self._read():
+                self.rebuild()
+            record = {"op": "put", "file": file, "entry": self._entry(file, save_data)}
+            self._fold(record)
+            self._append([record])
+            if _stamp(self.save_dir) != self._dir_stamp:
+                self._reconcile()  # Only stats files; this save's stamp already matches
+
+    def remove(self, file: str):
+        with self._lock:
+            self._ensure()
+            record = {"op": "remove", "file": file}
+            self._fold(record)
+            self._append([record])
+
+    def get(self, file: str):
+        with self._lock:
+            self._ensure()
+            entry = self._entries.get(file)
+            return dict(entry) if entry else None
+
+    def query(self, sort: str = "saved_at", descending: bool = True, **filters) -> list:
+        """Save entries, sorted and filtered (see query_entries), without opening any save."""
+        with self._lock:
+            self._ensure()
+            entries = list(self._entries.values())
+        return query_entries(entries, sort, descending, **filters)
+
+def query_entries(entries, sort: str = "saved_at", descending: bool = True, character: str = None, arc: int = None,
+                  text: str = None, limit: int = None) -> list:
+    """
+    Sorts and filters save entries.
+
+    Parameters:
+    - sort (str): One of SORT_KEYS; entries missing the field count as lowest.
+    - character (str): Exact character name (case-insensitive).
+    - arc (int): Only saves in this arc.
+    - text (str): Substring of the file, character or codename (case-insensitive).
+    - limit (int): Return at most this many.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort}'. Use one of {SORT_KEYS}.")
+    if character is not None:
+        entries = [e for e in entries if (e.get("character") or "").lower() == character.lower()]
+    if arc is not None:
+        entries = [e for e in entries if e.get("arc") == arc]
+    if text:
+        needle = text.lower()
+        entries = [
+            e for e in entries
+            if any(needle in (e.get(key) or "").lower() for key in ("file", "character", "codename"))
+        ]
+    entries = sorted(
+        entries, key=lambda e: (e.get(sort) is not None, e.get(sort) if e.get(sort) is not None else 0),
+        reverse=descending,
+    )
+    return [dict(e) for e in entries[:limit]]
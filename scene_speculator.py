@@ -0,0 +1,110 @@
+import logging
+import queue
+import threading
+
+log = logging.getLogger("dm_interface.speculator")
+
+class SceneSpeculator:
+    """
+    Pre-generates likely next DM narrations while the player is busy reading.
+
+    Candidate scenes are planned and generated one at a time on a daemon worker thread,
+    with at most `max_outstanding` jobs queued or running. Prompts are only built for
+    scenes that fit under that cap and are not already known, so callers can offer every
+    plausible scene cheaply. A finished narration is handed out once via `take()`;
+    `invalidate()` drops everything when the game state moves on.
+    """
+
+    def __init__(self, generate, max_outstanding: int = 2):
+        """
+        Parameters:
+        - generate (callable): Takes a prompt and returns the narration, or '' on failure.
+        - max_outstanding (int): Cap on speculative jobs that are queued or running.
+        """
+        self.generate = generate
+        self.max_outstanding = max_outstanding
+        self.hits = 0
+        self.misses = 0
+        self._jobs = {}  # prompt -> {"done": bool, "result": str}
+        self._scenes = {}  # scene key -> prompt built for it, so known scenes are not rebuilt
+        self._generation = 0  # Bumped by invalidate(); stale plans and results are thrown away
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _outstanding(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job["done"])
+
+    def speculate(self, candidates):
+        """
+        Hands candidate scenes to the worker thread and returns at once.
+
+        candidates is an iterable of (scene key, build) pairs, most likely first; it is
+        consumed lazily on the worker, and build() (which returns the prompt) is only
+        called for scenes that are not already queued or finished while there is room.
+        """
+        with self._lock:
+            self._queue.put((self._generation, "plan", candidates))
+
+    def take(self, prompt: str):
+        """Returns a finished narration for prompt (removing it), or None if none is ready."""
+        with self._lock:
+            job = self._jobs.get(prompt)
+            if job and job["done"]:
+                del self._jobs[prompt]
+                if job["result"]:
+                    self.hits += 1
+                    return job["result"]
+            self.misses += 1
+            return None
+
+    def invalidate(self):
+        """Discards every queued, running and finished speculative narration."""
+        with self._lock:
+            self._generation += 1
+            self._jobs.clear()
+            self._scenes.clear()
+
+    def _plan(self, generation: int, candidates):
+        for scene, build in candidates:
+            with self._lock:
+                if generation != self._generation or self._outstanding() >= self.max_outstanding:
+                    return
+                if self._scenes.get(scene) in self._jobs:
+                    continue
+            prompt = build()  # Outside the lock: rendering a prompt runs lore searches
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._scenes[scene] = prompt
+                if prompt not in self._jobs:
+                    self._jobs[prompt] = {"done": False, "result": ""}
+                    self._queue.put((generation, "generate", prompt))
+
+    def _run(self):
+        while True:
+            generation, kind, payload = self._queue.get()
+            if kind == "plan":
+                try:
+                    self._plan(generation, payload)
+                except Exception as e:
+                    log.error(f"⚠️ Planning speculative scenes failed: {e}")
+                continue
+
+            prompt = payload
+            with self._lock:
+                if generation != self._generation or prompt not in self._jobs:
+                    continue  # Invalidated before it started
+
+            try:
+                result = self.generate(prompt)
+            except Exception as e:
+                log.error(f"⚠️ Speculative generation failed: {e}")
+                result = ""
+
+            with self._lock:
+                job = self._jobs.get(prompt)
+                if generation == self._generation and job is not None:
+                    job["done"] = True
+                    job["result"] = result
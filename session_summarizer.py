@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+
+class SessionLogSummarizer:
+    """
+    Incremental, hierarchical summary of an append-only session log.
+
+    New log text is cut into chunks of about `chunk_chars` characters, each summarized once
+    and stored with its byte offsets. Whenever `fan_in` summaries pile up on one level they
+    are merged into a single summary on the level above, so the stored history is at most
+    `fan_in - 1` summaries per level. `digest()` combines those summaries with the
+    not-yet-summarized tail, which keeps end-of-session prompts the same size however long
+    the log grows. Progress is saved to `state_file`, so only new entries are processed.
+    """
+
+    def __init__(self, log_file: str, state_file: str, summarize, chunk_chars: int = 4000, fan_in: int = 8,
+                 summary_words: int = 120):
+        """
+        Parameters:
+        - summarize (callable): Takes a summarization prompt and returns the model's text ('' on failure).
+        - chunk_chars (int): Size of the log slices summarized in one call.
+        - fan_in (int): Number of summaries merged into one on the next level up.
+        - summary_words (int): Target length of every stored summary.
+        """
+        self.log_file = log_file
+        self.state_file = state_file
+        self.summarize = summarize
+        self.chunk_chars = chunk_chars
+        self.fan_in = fan_in
+        self.summary_words = summary_words
+        self._state = None
+        self._pass_lock = threading.Lock()  # Held for a whole catch-up pass; one pass at a time
+        self._worker_lock = threading.Lock()
+        self._worker = None
+
+    # 📌 Persistent State
+    def _load_state(self) -> dict:
+        if self._state is None:
+            state = None
+            if os.path.exists(self.state_file):
+                try:
+                    with open(self.state_file, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = None
+            self._state = state or self._empty_state()
+        return self._state
+
+    @staticmethod
+    def _empty_state() -> dict:
+        return {"offset": 0, "head": None, "levels": []}
+
+    def _save_state(self):
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.state_file}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, indent=4)
+        os.replace(temp_path, self.state_file)
+
+    def _log_head(self, offset: int) -> str:
+        """Hash of the log's first bytes (up to offset), used to notice that the log was replaced."""
+        with open(self.log_file, "rb") as f:
+            return hashlib.sha1(f.read(min(256, offset))).hexdigest()
+
+    def _log_size(self) -> int:
+        return os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+
+    def _check_log(self) -> int:
+        """Returns the log size, resetting the state if the log is gone, shrank or was replaced."""
+        state = self._load_state()
+        size = self._log_size()
+        if state["offset"] and (size < state["offset"] or self._log_head(state["offset"]) != state["head"]):
+            self._state = self._empty_state()
+        return size
+
+    # 📌 Incremental Summarization
+    def _read_from(self, offset: int, limit: int = None) -> bytes:
+        with open(self.log_file, "rb") as f:
+            f.seek(offset)
+            return f.read() if limit is None else f.read(limit)
+
+    def _next_chunk(self, offset: int, size: int):
+        """Returns (chunk_bytes, end_offset) for the next full chunk of whole lines, or None."""
+        if size - offset < self.chunk_chars:
+            return None
+        data = self._read_from(offset, max(self.chunk_chars * 2, 4096))
+        cut = data.rfind(b"\n", 0, self.chunk_chars + 1)
+        if cut < 0:
+            cut = data.find(b"\n", self.chunk_chars)  # A single long entry becomes its own chunk
+            if cut < 0:
+                return None
+        return data[:cut + 1], offset + cut + 1
+
+    def _chunk_prompt(self, text: str) -> str:
+        return (
+            f"Summarize these TTRPG session log entries in at most {self.summary_words} words.\n"
+            "Keep names, locations, decisions, faction changes and unresolved threads. "
+            "Reply with the summary only.\n\n"
+            f"{text}"
+        )
+
+    def _merge_prompt(self, summaries: list) -> str:
+        return (
+            f"Combine these consecutive summaries of a TTRPG session into one summary of at most "
+            f"{self.summary_words} words, oldest events first.\n"
+            "Keep names, locations, decisions, faction changes and unresolved threads. "
+            "Reply with the summary only.\n\n" + "\n\n".join(summaries)
+        )
+
+    def _roll_up(self) -> bool:
+        """Merges full levels upward. Returns False if a merge call failed."""
+        levels = self._state["levels"]
+        level = 0
+        while level < len(levels):
+            if len(levels[level]) < self.fan_in:
+                level += 1
+                continue
+            group = levels[level][:self.fan_in]
+            merged = self.summarize(self._merge_prompt([entry["summary"] for entry in group])).strip()
+            if not merged:
+                return False
+            if level + 1 == len(levels):
+                levels.append([])
+            levels[level + 1].append({"start": group[0]["start"], "end": group[-1]["end"], "summary": merged})
+            del levels[level][:self.fan_in]
+            self._save_state()
+        return True
+
+    def catch_up(self) -> int:
+        """
+        Summarizes every full chunk appended since the last run. Stops early (keeping its
+        place) if the model returns nothing. Returns the number of chunks summarized.
+        """
+        with self._pass_lock:
+            size = self._check_log()
+            state = self._state
+            done = 0
+            if not self._roll_up():
+                return done
+            while True:
+                chunk = self._next_chunk(state["offset"], size)
+                if chunk is None:
+                    break
+                data, end = chunk
+                summary = self.summarize(self._chunk_prompt(data.decode("utf-8", "replace"))).strip()
+                if not summary:
+                    break
+                if not state["levels"]:
+                    state["levels"].append([])
+                state["levels"][0].append({"start": state["offset"], "end": end, "summary": summary})
+                state["offset"] = end
+                state["head"] = self._log_head(end)
+                self._save_state()
+                done += 1
+                if not self._roll_up():
+                    break
+            return done
+
+    def notify(self):
+        """Called after the log grows; starts a background pass once a full chunk is waiting."""
+        with self._worker_lock:
+            if self._log_size() - self._load_state()["offset"] < self.chunk_chars:
+                return
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self.catch_up, daemon=True)
+            self._worker.start()
+
+    def wait(self, timeout: float = None):
+        """Blocks until any in-progress background pass finishes."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    # 📌 Reduce
+    def digest(self) -> str:
+        """
+        The whole session in bounded form: stored summaries (oldest first) followed by the
+        raw log entries that are not summarized yet, capped at two chunks' worth.
+        """
+        with self._pass_lock:
+            size = self._check_log()
+            entries = sorted((entry for level in self._state["levels"] for entry in level), key=lambda e: e["start"])
+            tail = self._read_from(self._state["offset"]).decode("utf-8", "replace") if size else ""
+
+        limit = self.chunk_chars * 2
+        if len(tail) > limit:
+            tail = "(earlier entries omitted)\n" + tail[-limit:].split("\n", 1)[-1]
+
+        sections = []
+        if entries:
+            sections.append("Summary of earlier events:\n" + "\n".join(f"- {entry['summary']}" for entry in entries))
+        if tail.strip():
+            sections.append("Latest log entries:\n" + tail.strip())
+        return "\n\n".join(sections)
@@ -0,0 +1,376 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Set GAME_STORAGE=sqlite (or call use_sqlite()) to keep world data, saves and session stats in one database
+STORAGE = os.getenv("GAME_STORAGE", "json")
+DB_PATH = os.getenv("GAME_DB", os.path.join("saves", "game.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    file TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    body TEXT NOT NULL              -- Top-level JSON of the file without its entity list
+);
+CREATE TABLE IF NOT EXISTS entities (
+    file TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    entity_id INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (file, position)
+);
+CREATE INDEX IF NOT EXISTS entities_by_name ON entities (file, name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS entities_by_id ON entities (file, entity_id);
+CREATE TABLE IF NOT EXISTS saves (
+    name TEXT PRIMARY KEY,
+    character TEXT,
+    arc INTEGER,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL,
+    checksum TEXT                   -- save_manifest.checksum of data
+);
+CREATE INDEX IF NOT EXISTS saves_by_time ON saves (updated_at);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    logged_at TEXT NOT NULL,
+    text TEXT NOT NULL,
+    unresolved INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS events_unresolved ON events (unresolved, id);
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+EVENT_KEYS = ("events", "unresolved_threads")  # Session stats kept as rows in the events table
+
+def _group(file_name: str) -> str:
+    return file_name.split(".")[0]  # "npcs.json" -> "npcs"
+
+class SQLiteStore:
+    """
+    SQLite storage for world data, saves and session stats.
+
+    Uses WAL mode, so readers never block the writer and several game sessions can share
+    one database; writes take the lock up front (BEGIN IMMEDIATE) and wait up to
+    `timeout` seconds for another writer. Each thread gets its own connection.
+
+    World data files map to a `documents` row plus one `entities` row per entry, indexed
+    by name and id, so single entities can be queried without loading the whole file.
+    """
+
+    def __init__(self, path: str = DB_PATH, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        if "checksum" not in {column for _, column, *_ in conn.execute("PRAGMA table_info(saves)")}:
+            conn.execute("ALTER TABLE saves ADD COLUMN checksum TEXT")  # Databases from before checksums
+
+    # 📌 Connections
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        """Closes this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # 📌 World Data
+    def document_version(self, file_name: str):
+        """Write counter of a data file (None if it isn't stored); cheap enough to check on every load."""
+        row = self._conn().execute("SELECT version FROM documents WHERE file = ?", (file_name,)).fetchone()
+        return row[0] if row else None
+
+    def load_document(self, file_name: str):
+        """Rebuilds a data file's JSON structure, or returns None if it isn't stored."""
+        conn = self._conn()
+        row = conn.execute("SELECT body FROM documents WHERE file = ?", (file_name,)).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        data[_group(file_name)] = [
+            json.loads(entity) for (entity,) in
+            conn.execute("SELECT data FROM entities WHERE file = ? ORDER BY position", (file_name,))
+        ]
+        return data
+
+    def save_document(self, file_name: str, data: dict) -> int:
+        """Replaces a data file in one transaction. Returns its new version."""
+        group = _group(file_name)
+        body = {key: value for key, value in data.items() if key != group}
+        rows = []
+        for position, entry in enumerate(data.get(group, [])):
+            fields = entry if isinstance(entry, dict) else {}
+            entity_id = fields.get("id") if isinstance(fields.get("id"), int) else None
+            rows.append((file_name, position, fields.get("name"), entity_id, json.dumps(entry)))
+
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO documents (file, version, body) VALUES (?, 1, ?) "
+                "ON CONFLICT(file) DO UPDATE SET version = version + 1, body = excluded.body",
+                (file_name, json.dumps(body)),
+            )
+            conn.execute("DELETE FROM entities WHERE file = ?", (file_name,))
+            conn.executemany(
+                "INSERT INTO entities (file, position, name, entity_id, data) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            return conn.execute("SELECT version FROM documents WHERE file = ?", (file_name,)).fetchone()[0]
+
+    def find_entities(self, file_name: str, name: str = None, entity_id: int = None) -> list:
+        """Indexed lookup of entries by name (case-insensitive) and/or id."""
+        query, params = "SELECT data FROM entities WHERE file = ?", [file_name]
+        if name is not None:
+            query += " AND name = ? COLLATE NOCASE"
+            params.append(name)
+        if entity_id is not None:
+            query += " AND entity_id = ?"
+            params.append(entity_id)
+        return [json.loads(data) for (data,) in self._conn().execute(query + " ORDER BY position", params)]
+
+    def list_documents(self) -> list:
+        return [file for (file,) in self._conn().execute("SELECT file FROM documents ORDER BY file")]
+
+    # 💾 Saves
+    def save_game(self, name: str, data: dict):
+        from save_manifest import checksum  # Imported here: save_manifest depends on the loader
+        character = (data.get("player_character") or {}).get("name")
+        arc = (data.get("story_state") or {}).get("arc")
+        blob = json.dumps(data)
+        digest = checksum(json.loads(blob))  # Of the data as stored, matching save_manifest entries
+        with self._write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO saves (name, character, arc, updated_at, data, checksum) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, character, arc if isinstance(arc, int) else None, time.time(), blob, digest),
+            )
+
+    def load_game(self, name: str):
+        row = self._conn().execute("SELECT data FROM saves WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_saves(self) -> list:
+        """Save names, most recently written first."""
+        return [name for (name,) in self._conn().execute("SELECT name FROM saves ORDER BY updated_at DESC")]
+
+    def save_entries(self) -> list:
+        """
+        Picker metadata for every save (the save_manifest entry layout), read from indexed
+        columns. Rows written before checksums were stored get theirs computed from the data once.
+        """
+        from save_manifest import checksum
+        rows = self._conn().execute(
+            "SELECT name, character, json_extract(data, '$.player_character.codename'), "
+            "json_extract(data, '$.player_character.level'), arc, updated_at, length(data), checksum FROM saves"
+        ).fetchall()
+        missing = [name for name, *_, digest in rows if digest is None]
+        if missing:
+            with self._write() as conn:
+                for name in missing:
+                    (data,) = conn.execute("SELECT data FROM saves WHERE name = ?", (name,)).fetchone()
+                    conn.execute(
+                        "UPDATE saves SET checksum = ? WHERE name = ?", (checksum(json.loads(data)), name)
+                    )
+            return self.save_entries()
+        return [
+            {"file": name, "character": character, "codename": codename, "level": level or 1, "arc": arc,
+             "saved_at": updated_at, "size": size, "checksum": digest}
+            for name, character, codename, level, arc, updated_at, size, digest in rows
+        ]
+
+    def delete_save(self, name: str) -> bool:
+        with self._write() as conn:
+            return conn.execute("DELETE FROM saves WHERE name = ?", (name,)).rowcount > 0
+
+    # 📊 Session Stats & Events
+    def add_event(self, text: str, unresolved: bool = False, logged_at: str = None):
+        """Appends one event row instead of rewriting the whole event list."""
+        logged_at = logged_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO events (logged_at, text, unresolved) VALUES (?, ?, ?)", (logged_at, text, int(unresolved))
+            )
+
+    def events(self, unresolved: bool = None, limit: int = None) -> list:
+        """Event texts in logged order; with a limit, only the most recent ones."""
+        query, params = "SELECT text FROM events", []
+        if unresolved is not None:
+            query += " WHERE unresolved = ?"
+            params.append(int(unresolved))
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [text for (text,) in self._conn().execute(query, params)][::-1]
+
+    def load_stats(self, with_events: bool = True, recent_events: int = None):
+        """Session stats in the session_stats.json layout, or None if none were recorded."""
+        rows = self._conn().execute("SELECT key, value FROM stats").fetchall()
+        if not rows:
+            return None
+        stats = {key: json.loads(value) for key, value in rows}
+        if with_events:
+            stats["events"] = self.events(limit=recent_events)
+            stats["unresolved_threads"] = self.events(unresolved=True)
+        return stats
+
+    def save_stats(self, stats: dict):
+        """Stores the stats fields; events and unresolved threads live in the events table."""
+        rows = [(key, json.dumps(value)) for key, value in stats.items() if key not in EVENT_KEYS]
+        with self._write() as conn:
+            conn.executemany("INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)", rows)
+
+    # 🔄 JSON Import / Export
+    def import_json(self, data_dir: str, save_dir: str) -> dict:
+        """Loads the JSON layout (data files, saves, runtime state, session_stats.json) into the database."""
+        counts = {"documents": 0, "saves": 0, "events": 0}
+        if os.path.isdir(data_dir):
+            for file_name in sorted(os.listdir(data_dir)):
+                if file_name.endswith(".json"):
+                    with open(os.path.join(data_dir, file_name), "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if isinstance(data, dict):
+                        self.save_document(file_name, data)
+                        counts["documents"] += 1
+
+        if os.path.isdir(save_dir):
+            # Imported here: both depend on this module
+            from game_data_loader import STATE_FILES
+            from save_codec import SAVE_EXTENSION, read_save
+            for file_name in sorted(os.listdir(save_dir)):
+                if not file_name.endswith((".json", SAVE_EXTENSION)):
+                    continue
+                path = os.path.join(save_dir, file_name)
+                try:
+                    if file_name == "session_stats.json" or file_name in STATE_FILES:
+                        with open(path, "r", encoding="utf-8") as f:
+                            data = json.load(f)
+                    else:
+                        data = read_save(path)  # Binary or JSON save, migrated to the current schema
+                except ValueError:
+                    continue
+                if file_name in STATE_FILES:
+                    if isinstance(data, dict):
+                        self.save_document(file_name, data)
+                        counts["documents"] += 1
+                elif file_name == "session_stats.json":
+                    unresolved = set(data.get("unresolved_threads", []))
+                    logged_at = data.get("last_event_time") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    with self._write() as conn:
+                        conn.execute("DELETE FROM events")
+                        conn.executemany(
+                            "INSERT INTO events (logged_at, text, unresolved) VALUES (?, ?, ?)",
+                            [(logged_at, text, int(text in unresolved)) for text in data.get("events", [])],
+                        )
+                    self.save_stats(data)
+                    counts["events"] += len(data.get("events", []))
+                elif isinstance(data, dict) and "player_character" in data:
+                    self.save_game(file_name, data)
+                    counts["saves"] += 1
+        return counts
+
+    def export_json(self, data_dir: str, save_dir: str) -> dict:
+        """
+        Writes the database back out in the layout the file backend reads: .sav saves in the
+        binary save format, everything else as JSON. Stale delta journals next to exported
+        saves are removed so they don't replay over the exported state.
+        """
+        # Imported here: these depend on this module
+        from game_data_loader import STATE_FILES
+        from save_codec import SAVE_EXTENSION, write_save
+        from save_journal import journal_path
+        counts = {"documents": 0, "saves": 0}
+        os.makedirs(data_dir, exist_ok=True)
+        os.makedirs(save_dir, exist_ok=True)
+        for file_name in self.list_documents():
+            directory = save_dir if file_name in STATE_FILES else data_dir  # Runtime state lives beside the saves
+            with open(os.path.join(directory, file_name), "w", encoding="utf-8") as f:
+                json.dump(self.load_document(file_name), f, indent=4)
+            counts["documents"] += 1
+        for name in self.list_saves():
+            if name.endswith(SAVE_EXTENSION):
+                path = os.path.join(save_dir, name)
+                write_save(path, self.load_game(name))
+            else:
+                path = os.path.join(save_dir, name if name.endswith(".json") else f"{name}.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(self.load_game(name), f, indent=4)
+            if os.path.exists(journal_path(path)):
+                os.remove(journal_path(path))
+            counts["saves"] += 1
+        stats = self.load_stats()
+        if stats is not None:
+            with open(os.path.join(save_dir, "session_stats.json"), "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=4)
+        return counts
+
+# 📌 Active Store
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """The SQLite store when GAME_STORAGE=sqlite (or after use_sqlite()), otherwise None (JSON files)."""
+    global _store
+    if STORAGE != "sqlite":
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteStore(DB_PATH)
+        return _store
+
+def use_sqlite(path: str = None):
+    """Switches persistence to the SQLite database at path (default DB_PATH)."""
+    global STORAGE, DB_PATH, _store
+    with _store_lock:
+        STORAGE, DB_PATH, _store = "sqlite", path or DB_PATH, None
+
+def use_json():
+    """Switches persistence back to JSON files."""
+    global STORAGE, _store
+    with _store_lock:
+        STORAGE, _store = "json", None
+
+if __name__ == "__main__":
+    # python sqlite_store.py import|export [data_dir] [save_dir] [db_path]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export"):
+        print("Usage: python sqlite_store.py import|export [data_dir] [save_dir] [db_path]")
+        sys.exit(1)
+    from game_data_loader import get_data_dir
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else get_data_dir()
+    save_dir = sys.argv[3] if len(sys.argv) > 3 else "saves"
+    store = SQLiteStore(sys.argv[4] if len(sys.argv) > 4 else DB_PATH)
+    if sys.argv[1] == "import":
+        print(f"✅ Imported into {store.path}: {store.import_json(data_dir, save_dir)}")
+    else:
+        print(f"✅ Exported from {store.path}: {store.export_json(data_dir, save_dir)}")
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+import dm_interface
+from dm_logging import shutdown_dm_logging
+from mock_dm import DMFixtures
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def dm_log(tmp_path, monkeypatch):
+    """Points the DM log and fixtures at tmp_path with an instant mock backend."""
+    shutdown_dm_logging()  # The log file is fixed once logging is configured
+    monkeypatch.chdir(tmp_path)
+    for key, value in {
+        "log_file": str(tmp_path / "dm_interface.log"),
+        "fixtures_path": str(tmp_path / "dm_fixtures.jsonl"),
+        "mock_profile": "instant",
+        "cache_enabled": False,
+        "record_fixtures": False,
+    }.items():
+        monkeypatch.setitem(dm_interface.DM_CONFIG, key, value)
+    yield tmp_path
+    shutdown_dm_logging()
+
+def test_streamed_and_sent_sessions_round_trip(dm_log):
+    prompts = {"streamed": "The hero streams into the plaza.", "sent": "The hero walks into the plaza."}
+    session = dm_interface.DMSession("mock")
+    replies = {
+        "streamed": "".join(dm_interface.send_prompt_to_dm(prompts["streamed"], "mock", stream=True, session=session)),
+        "sent": dm_interface.send_prompt_to_dm(prompts["sent"], "mock", session=session),
+    }
+    shutdown_dm_logging()  # Writes out the queued log records
+
+    fixtures = DMFixtures(str(dm_log / "dm_fixtures.jsonl"))
+    assert fixtures.import_log(str(dm_log / "dm_interface.log"), skip=dm_interface.ERROR_RESPONSES) == 2
+    for mode, prompt in prompts.items():
+        assert fixtures.get(dm_interface.preprocess_prompt(prompt)) == replies[mode].strip()
+
+def test_legacy_log_imports_without_backend_names(tmp_path):
+    fixtures = DMFixtures(str(tmp_path / "dm_fixtures.jsonl"))
+    skip = dm_interface.ERROR_RESPONSES | dm_interface.INVALID_OPTION_RESPONSES
+    assert fixtures.import_log(os.path.join(REPO_DIR, "logs", "dm_interface.log"), skip=skip) == 3
+
+    with open(fixtures.path, encoding="utf-8") as f:
+        recorded = [line for line in f if line.strip()]
+    assert len(recorded) == 3
+    portal = next(line for line in recorded if "portal opening" in line)
+    assert "The portal is unlike anything" in portal and '"backend": "mistral"' in portal
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ollama_client import OllamaClient
+
+STREAM_WORDS = 50
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate like Ollama: one JSON reply, or NDJSON chunks when streaming."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, as the real server does
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+
+        if not body.get("stream", True):
+            reply = json.dumps({"response": f"echo: {body['prompt']}", "done": True, "context": [1, 2, 3]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = [f"word{i} " for i in range(body.get("options", {}).get("num_predict", STREAM_WORDS))]
+        try:
+            for word in words:
+                self._write_chunk({"response": word, "done": False})
+                time.sleep(server.chunk_delay)
+            self._write_chunk({"response": "", "done": True, "context": [1, 2, 3]})
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            server.aborted.set()  # The client dropped the connection mid-generation
+            self.close_connection = True
+
+    def _write_chunk(self, message: dict):
+        line = json.dumps(message).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+@pytest.fixture
+def fake_ollama():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    server.daemon_threads = True
+    server.connections = set()
+    server.aborted = threading.Event()
+    server.chunk_delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def client(fake_ollama):
+    client = OllamaClient(f"127.0.0.1:{fake_ollama.server_address[1]}", timeout=5)
+    yield client
+    client.close()
+
+def test_requests_reuse_one_connection(fake_ollama, client):
+    replies = [client.generate("mistral", f"turn {i}")["response"] for i in range(3)]
+
+    assert replies == ["echo: turn 0", "echo: turn 1", "echo: turn 2"]
+    assert len(fake_ollama.connections) == 1
+
+def test_stream_yields_ndjson_chunks_and_frees_the_connection(fake_ollama, client):
+    messages = list(client.stream_generate("mistral", "tell a story", options={"num_predict": 5}))
+
+    assert "".join(message["response"] for message in messages) == "word0 word1 word2 word3 word4 "
+    assert messages[-1]["done"] and messages[-1]["context"] == [1, 2, 3]
+    client.generate("mistral", "next turn")
+    assert len(fake_ollama.connections) == 1
+
+def test_closing_a_stream_mid_response_drops_the_connection(fake_ollama, client):
+    fake_ollama.chunk_delay = 0.02
+    stream = client.stream_generate("mistral", "tell a long story")
+    assert next(stream)["response"] == "word0 "
+    stream.close()
+
+    assert fake_ollama.aborted.wait(5)  # The server stops generating instead of finishing the reply
+    assert client.generate("mistral", "next turn")["response"] == "echo: next turn"
+    assert len(fake_ollama.connections) == 2  # The half-read connection was not put back in the pool
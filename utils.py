@@ -1,11 +1,16 @@
 import os
 import json
 from datetime import datetime
-from dm_interface import send_prompt_to_dm  # AI-driven summaries
+from dm_interface import send_prompt_to_dm, send_prompts_concurrently, ERROR_RESPONSES, PRIORITY_SUMMARY  # AI-driven summaries
+from session_summarizer import SessionLogSummarizer
+from sqlite_store import get_store
 
 SAVE_DIR = "saves"
 LOG_FILE = os.path.join(SAVE_DIR, "game_log.txt")
+LOG_SUMMARY_FILE = os.path.join(SAVE_DIR, "game_log_summaries.json")  # Chunk summaries + offsets of LOG_FILE
 SESSION_STATS_FILE = os.path.join(SAVE_DIR, "session_stats.json")
+LOG_CHUNK_CHARS = 4000  # Log text summarized per DM call
+LOG_SUMMARY_FAN_IN = 8  # Chunk summaries merged into one higher-level summary
 
 FACTIONS = ["Vanguard Alliance", "Black Market Syndicate", "Wyrm Pact", "Crimson Court"]  # Default factions
 
@@ -29,16 +34,78 @@ def load_from_file(filename):
     with open(filepath, 'r') as f:
         return json.load(f)
 
+# 📌 Session Stats Storage (session_stats.json, or the SQLite store)
+def new_session_stats():
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return {
+        "start_time": now,
+        "playtime": "0:00",
+        "events": [],
+        "unresolved_threads": [],
+        "faction_reputation": {faction: 0 for faction in FACTIONS},
+        "last_event_time": now,
+    }
+
+def load_session_stats(recent_events=None):
+    """Session stats, or None if nothing was recorded. The SQLite store only reads the recent_events newest events."""
+    store = get_store()
+    if store is not None:
+        return store.load_stats(recent_events=recent_events)
+    return load_from_file("session_stats.json")
+
+def save_session_stats(stats):
+    store = get_store()
+    if store is not None:
+        store.save_stats(stats)
+    else:
+        save_to_file(stats, "session_stats.json")
+
+# 📌 Incremental Log Summaries
+_log_summarizer = None
+
+def get_log_summarizer(dm_option=None):
+    """
+    Returns the shared summarizer for LOG_FILE. dm_option switches the DM backend it
+    summarizes with; without one it keeps its current backend (Mistral when first created).
+    """
+    global _log_summarizer
+    if dm_option is None:
+        if _log_summarizer is not None:
+            return _log_summarizer
+        dm_option = "mistral"
+
+    def summarize(prompt):
+        response = send_prompt_to_dm(
+            prompt, dm_option, preprocess=False, priority=PRIORITY_SUMMARY, call_site="log_chunk_summary"
+        )
+        return "" if response in ERROR_RESPONSES else response
+
+    if _log_summarizer is None:
+        _log_summarizer = SessionLogSummarizer(
+            LOG_FILE, LOG_SUMMARY_FILE, summarize, chunk_chars=LOG_CHUNK_CHARS, fan_in=LOG_SUMMARY_FAN_IN
+        )
+    else:
+        _log_summarizer.summarize = summarize
+    return _log_summarizer
+
 # 📌 Log Events & Track Unresolved Story Threads
-def log_event(event_text, unresolved=False):
-    """Logs events and tracks unresolved story threads."""
+def log_event(event_text, unresolved=False, dm_option=None):
+    """
+    Logs events and tracks unresolved story threads. Completed log chunks are summarized in
+    the background with dm_option, or with the backend the summarizer already uses; with
+    neither, summaries wait for generate_session_summary.
+    """
     ensure_save_directory()
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # Write to log file
-    with open(LOG_FILE, 'a') as f:
+    with open(LOG_FILE, 'a', encoding='utf-8') as f:
         f.write(f"[{timestamp}] {event_text}\n")
 
+    # Summarize completed log chunks in the background
+    if dm_option is not None or _log_summarizer is not None:
+        get_log_summarizer(dm_option).notify()
+
     # Update session stats
     update_session_stats(event_text, unresolved)
 
@@ -49,8 +116,11 @@ def generate_session_summary(dm_option="mistral"):
         print("⚠️ No events logged yet.")
         return
 
-    with open(LOG_FILE, 'r') as f:
-        log_content = f.read()
+    # Only entries logged since the last run are summarized; the rest comes from stored summaries
+    summarizer = get_log_summarizer(dm_option)
+    summarizer.wait()
+    summarizer.catch_up()
+    log_content = summarizer.digest()
 
     prompt = (
         "Summarize the following game session logs while ensuring structured storytelling.\n"
@@ -59,17 +129,20 @@ def generate_session_summary(dm_option="mistral"):
         f"{log_content}"
     )
 
-    summary = send_prompt_to_dm(prompt, dm_option)
-    print("\n📜 **Session Summary:**")
-    print(summary)
-
     # AI-Generated Future Objectives
     objectives_prompt = (
         "Based on the game session logs, suggest 3 structured future objectives for the player.\n"
         "Keep them directly tied to past decisions and unresolved storylines.\n\n"
         f"{log_content}"
     )
-    objectives = send_prompt_to_dm(objectives_prompt, dm_option)
+
+    # Both prompts only depend on the log, so they are dispatched together
+    summary, objectives = send_prompts_concurrently(
+        [prompt, objectives_prompt], dm_option, priority=PRIORITY_SUMMARY, call_site="generate_session_summary"
+    )
+
+    print("\n📜 **Session Summary:**")
+    print(summary)
     
     print("\n🎯 **Future Objectives:**")
     print(objectives)
@@ -79,22 +152,20 @@ def generate_session_summary(dm_option="mistral"):
 # 📌 Track Player Session Stats, Faction Reputation, & Unresolved Threads
 def update_session_stats(event_text, unresolved=False):
     """Tracks player session stats, unresolved storylines, and faction influence."""
-    ensure_save_directory()
-
-    stats = load_from_file("session_stats.json") or {
-        "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "playtime": "0:00",
-        "events": [],
-        "unresolved_threads": [],
-        "faction_reputation": {faction: 0 for faction in FACTIONS},
-        "last_event_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    }
+    store = get_store()
+    if store is not None:
+        # One indexed row per event instead of rewriting the whole event list
+        store.add_event(event_text, unresolved)
+        stats = store.load_stats(with_events=False) or new_session_stats()
+    else:
+        ensure_save_directory()
+        stats = load_from_file("session_stats.json") or new_session_stats()
 
-    stats["events"].append(event_text)
+        stats["events"].append(event_text)
 
-    # Track unresolved threads
-    if unresolved:
-        stats["unresolved_threads"].append(event_text)
+        # Track unresolved threads
+        if unresolved:
+            stats["unresolved_threads"].append(event_text)
 
     # Update playtime
     start_time = datetime.strptime(stats["start_time"], "%Y-%m-%d %H:%M:%S")
@@ -102,18 +173,18 @@ def update_session_stats(event_text, unresolved=False):
     stats["playtime"] = str(elapsed_time).split('.')[0]  # Remove milliseconds
     stats["last_event_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    save_to_file(stats, "session_stats.json")
+    save_session_stats(stats)
 
 # 📌 Adjust Faction Reputation
 def adjust_faction_reputation(faction, amount):
     """Modifies reputation with a specific faction."""
-    stats = load_from_file("session_stats.json") or {
+    stats = load_session_stats(recent_events=0) or {
         "faction_reputation": {faction: 0 for faction in FACTIONS}
     }
 
     if faction in stats["faction_reputation"]:
         stats["faction_reputation"][faction] += amount
-        save_to_file(stats, "session_stats.json")
+        save_session_stats(stats)
         print(f"🔺 {faction} reputation adjusted by {amount}. New reputation: {stats['faction_reputation'][faction]}")
     else:
         print(f"⚠️ Faction '{faction}' not found.")
@@ -121,7 +192,7 @@ def adjust_faction_reputation(faction, amount):
 # 📌 Display Player Stats & Faction Reputation
 def display_session_stats():
     """Displays playtime, recent events, unresolved storylines, and faction standings."""
-    stats = load_from_file("session_stats.json")
+    stats = load_session_stats(recent_events=5)
     if not stats:
         print("No session stats recorded yet.")
         return
@@ -1,5 +1,8 @@
 from dataclasses import dataclass, field
 from typing import List, Dict
+import threading
+from game_data_loader import cached
+from world_state import WorldState
 
 @dataclass
 class Location:
@@ -24,7 +27,23 @@ class NPC:
     reputation: Dict[str, int] = field(default_factory=dict)  # Tracks faction reputation
     evolving_state: str = "Base"  # Changes based on player interaction
 
+# 📌 Persistent World State (changes on top of the seed data below, stored with the save)
+_world_state = WorldState()
+_world_state_lock = threading.Lock()
+
+def get_world_state() -> WorldState:
+    return _world_state
+
+def restore_world_state(data: dict = None):
+    """Replaces the world state with a saved one (None starts a fresh world) and re-applies it."""
+    global _world_state
+    with _world_state_lock:
+        _world_state = WorldState.from_dict(data)
+        get_organizations.invalidate()
+        get_npcs.invalidate()
+
 # 📌 Core City Locations
+@cached("world.get_core_locations")
 def get_core_locations():
     return [
         Location("Apex District", "Financial and political center.", "Vanguard Alliance", ["Defend the Council", "Expose Corrupt Officials"]),
@@ -36,6 +55,7 @@ def get_core_locations():
     ]
 
 # 📌 Global Locations for Major Arcs
+@cached("world.get_global_locations")
 def get_global_locations():
     return [
         Location("Frostspire Tundra", "Frozen wasteland hiding ancient ruins.", "Wyrm Pact", ["Retrieve Lost Artifact"]),
@@ -49,8 +69,9 @@ def get_global_locations():
     ]
 
 # 📌 Organizations with Influence Tracking
+@cached("world.get_organizations")  # Built once, with the world state's influence levels applied
 def get_organizations():
-    return [
+    organizations = [
         Organization("The Vanguard Alliance", "Heroic", "Elite superhero team.", 80),
         Organization("Global Peace Initiative", "Heroic", "Monitors superpowered threats.", 70),
         Organization("Crimson Court", "Villainous", "Vampiric cabal.", 60),
@@ -59,10 +80,14 @@ def get_organizations():
         Organization("The Revenant Corps", "Neutral", "Mercenaries working for the highest bidder.", 65),
         Organization("Black Market Syndicate", "Villainous", "Criminal network controlling illicit trades.", 55),
     ]
+    for org in organizations:
+        org.influence_level = _world_state.influence(org.name, org.influence_level)
+    return organizations
 
 # 📌 NPCs with Dynamic Reputation System
+@cached("world.get_npcs")  # Built once, with the world state's evolution and reputation applied
 def get_npcs():
-    return [
+    npcs = [
         # **Heroes**
         NPC("Starlight", "Hero", "Vanguard Alliance", "Solar energy manipulator.", {"Vanguard Alliance": 20}),
         NPC("Zephyr", "Hero", "Vanguard Alliance", "Wind controller and speedster.", {"Vanguard Alliance": 15, "Neutral": 5}),
@@ -80,6 +105,10 @@ def get_npcs():
         NPC("Warp Stalker", "Neutral", "Black Market Syndicate", "Metahuman smuggler.", {"Black Market Syndicate": 15}, "Shifting Loyalties"),
         NPC("Chimera", "Neutral", "Wyrm Pact", "Shapeshifting spy.", {"Wyrm Pact": 20, "Crimson Court": -10}, "Evolving"),
     ]
+    for npc in npcs:
+        npc.evolving_state = _world_state.npc_state(npc.name, npc.evolving_state)
+        npc.reputation.update(_world_state.npc_reputation(npc.name))
+    return npcs
 
 # 📌 Function to Track NPC Evolution
 def evolve_npc(npc_name, new_state):
@@ -88,6 +117,7 @@ def evolve_npc(npc_name, new_state):
     for npc in npcs:
         if npc.name == npc_name:
             npc.evolving_state = new_state
+            _world_state.set_npc_state(npc_name, new_state)
             print(f"🔄 {npc_name} has evolved to state: {new_state}")
             return
     print(f"⚠️ NPC '{npc_name}' not found.")
@@ -99,6 +129,18 @@ def adjust_faction_influence(faction_name, amount):
     for org in organizations:
         if org.name == faction_name:
             org.influence_level = max(0, min(100, org.influence_level + amount))  # Keep within 0-100 range
+            _world_state.set_influence(faction_name, org.influence_level)
             print(f"📈 {faction_name} influence adjusted to {org.influence_level}")
             return
     print(f"⚠️ Faction '{faction_name}' not found.")
+
+# 📌 Function to Adjust an NPC's Standing with a Faction
+def adjust_npc_reputation(npc_name, faction_name, amount):
+    """Modifies how an NPC regards a faction."""
+    for npc in get_npcs():
+        if npc.name == npc_name:
+            npc.reputation[faction_name] = npc.reputation.get(faction_name, 0) + amount
+            _world_state.set_npc_reputation(npc_name, faction_name, npc.reputation[faction_name])
+            print(f"🤝 {npc_name}'s standing with {faction_name} is now {npc.reputation[faction_name]}")
+            return
+    print(f"⚠️ NPC '{npc_name}' not found.")
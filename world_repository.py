@@ -0,0 +1,135 @@
+import threading
+from game_data_loader import get_npcs, get_locations, get_factions, get_arcs, data_version, reload_data
+
+WORLD_FILES = ("npcs.json", "locations.json", "factions.json", "arcs.json")
+
+def name_key(name) -> str:
+    """Case-insensitive lookup key; a leading 'The' is ignored ('The Crimson Court' == 'crimson court')."""
+    key = " ".join(str(name).lower().split())
+    return key[4:] if key.startswith("the ") else key
+
+class WorldRepository:
+    """
+    World data loaded once, with the indexes GameEngine needs:
+
+    - name -> NPC / location / faction (case-insensitive), arc id -> arc
+    - arc id -> NPCs, locations and factions tied to it
+    - location -> NPCs found there, faction -> member NPCs
+
+    Lookups are dictionary hits, so menu actions stay fast with large content packs.
+    A repository built by `load()` follows the game_data_loader cache: `refresh()` rebuilds
+    the indexes only when one of the data files was re-read or saved.
+    """
+
+    def __init__(self, npcs=(), locations=(), factions=(), arcs=()):
+        self._versions = None  # Data file versions the indexes were built from (None = fixed data)
+        self._build(list(npcs), list(locations), list(factions), list(arcs))
+
+    @classmethod
+    def load(cls):
+        """Builds a repository from the game data files."""
+        repository = cls()
+        repository.refresh()
+        return repository
+
+    def refresh(self) -> bool:
+        """Rebuilds the indexes if the data files changed since they were built. Returns True if rebuilt."""
+        versions = data_version(*WORLD_FILES)
+        if versions == self._versions:
+            return False
+        self._build(get_npcs(), get_locations(), get_factions(), get_arcs())
+        self._versions = versions
+        return True
+
+    def reload(self):
+        """Forces the data files to be re-read and rebuilds every index."""
+        for file_name in WORLD_FILES:
+            reload_data(file_name)
+        self.refresh()
+
+    @staticmethod
+    def _add(index: dict, key, entry: dict):
+        index.setdefault(key, {})[id(entry)] = entry  # Keyed by identity: no duplicates, insertion order kept
+
+    def _build(self, npcs, locations, factions, arcs):
+        self.npcs, self.locations, self.factions, self.arcs = npcs, locations, factions, arcs
+
+        self._npcs_by_name = {name_key(npc["name"]): npc for npc in reversed(npcs) if "name" in npc}
+        self._locations_by_name = {name_key(loc["name"]): loc for loc in reversed(locations) if "name" in loc}
+        self._factions_by_name = {name_key(fac["name"]): fac for fac in reversed(factions) if "name" in fac}
+        self._arcs_by_id = {arc["id"]: arc for arc in reversed(arcs) if "id" in arc}
+
+        self._arc_npcs, self._arc_locations, self._arc_factions = {}, {}, {}
+        self._location_npcs, self._faction_members = {}, {}
+
+        for npc in npcs:
+            for arc_id in npc.get("relevant_arc", []):
+                self._add(self._arc_npcs, arc_id, npc)
+            for location in [npc.get("location"), *npc.get("known_locations", [])]:
+                if location:
+                    self._add(self._location_npcs, name_key(location), npc)
+            if npc.get("faction"):
+                self._add(self._faction_members, name_key(npc["faction"]), npc)
+
+        for location in locations:
+            for arc_id in location.get("arc_restricted", []):
+                self._add(self._arc_locations, arc_id, location)
+            for npc_name in location.get("notable_npcs", []):
+                npc = self._npcs_by_name.get(name_key(npc_name))
+                if npc:
+                    self._add(self._location_npcs, name_key(location["name"]), npc)
+
+        for faction in factions:
+            for arc_id in faction.get("relevant_arc", []):
+                self._add(self._arc_factions, arc_id, faction)
+            for member in [faction.get("leader"), *faction.get("notable_members", [])]:
+                npc = self._npcs_by_name.get(name_key(member)) if member else None
+                if npc:
+                    self._add(self._faction_members, name_key(faction["name"]), npc)
+
+    # 📌 Lookups
+    def npc(self, name: str):
+        return self._npcs_by_name.get(name_key(name))
+
+    def location(self, name: str):
+        return self._locations_by_name.get(name_key(name))
+
+    def faction(self, name: str):
+        return self._factions_by_name.get(name_key(name))
+
+    def arc(self, arc_id: int):
+        return self._arcs_by_id.get(arc_id)
+
+    # 📌 Relations
+    def arc_npcs(self, arc_id: int) -> list:
+        return list(self._arc_npcs.get(arc_id, {}).values())
+
+    def arc_locations(self, arc_id: int) -> list:
+        return list(self._arc_locations.get(arc_id, {}).values())
+
+    def arc_factions(self, arc_id: int) -> list:
+        return list(self._arc_factions.get(arc_id, {}).values())
+
+    def npcs_at(self, location_name: str) -> list:
+        return list(self._location_npcs.get(name_key(location_name), {}).values())
+
+    def faction_members(self, faction_name: str) -> list:
+        return list(self._faction_members.get(name_key(faction_name), {}).values())
+
+    def arc_summaries(self) -> list:
+        """'id: name - description' lines for every arc."""
+        return [f"{arc['id']}: {arc['name']} - {arc['description']}" for arc in self.arcs]
+
+# 📌 Shared repository, so GameEngine and arc_loader read the data once
+_world = None
+_world_lock = threading.Lock()
+
+def get_world() -> WorldRepository:
+    """Returns the shared world repository, loading it on first use and refreshing it after data changes."""
+    global _world
+    with _world_lock:
+        if _world is None:
+            _world = WorldRepository.load()
+        else:
+            _world.refresh()
+        return _world
@@ -0,0 +1,102 @@
+import copy
+import threading
+
+CHECKPOINT_EVERY = 50  # Journal entries folded into the checkpoint at a time
+
+class WorldState:
+    """
+    Persistent changes to the world.py seed data: NPC evolving states and reputation,
+    and organization influence levels.
+
+    Only changed values are held (as an overlay on the seed data). Every mutation is
+    appended to a journal of absolute values; every `checkpoint_every` entries the journal
+    is folded into a checkpoint. A save stores the checkpoint plus the short journal, and
+    loading replays the journal on top of the checkpoint.
+    """
+
+    def __init__(self, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.checkpoint_every = checkpoint_every
+        self.seq = 0  # Sequence number of the last journal entry
+        self.journal = []  # Entries since the last checkpoint
+        self._checkpoint = self._empty()
+        self._state = self._empty()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty() -> dict:
+        return {"npc_states": {}, "npc_reputation": {}, "influence": {}}
+
+    # 📌 Reads
+    def npc_state(self, name: str, default: str = None):
+        return self._state["npc_states"].get(name, default)
+
+    def npc_reputation(self, name: str) -> dict:
+        """Changed reputation values of an NPC ({faction: value})."""
+        return dict(self._state["npc_reputation"].get(name, {}))
+
+    def influence(self, name: str, default: int = None):
+        return self._state["influence"].get(name, default)
+
+    # 📌 Mutations
+    def set_npc_state(self, name: str, state: str):
+        self._record({"op": "npc_state", "name": name, "value": state})
+
+    def set_npc_reputation(self, name: str, faction: str, value: int):
+        self._record({"op": "npc_reputation", "name": name, "faction": faction, "value": value})
+
+    def set_influence(self, name: str, value: int):
+        self._record({"op": "influence", "name": name, "value": value})
+
+    @staticmethod
+    def _apply(state: dict, entry: dict):
+        op, name, value = entry["op"], entry["name"], entry["value"]
+        if op == "npc_state":
+            state["npc_states"][name] = value
+        elif op == "npc_reputation":
+            state["npc_reputation"].setdefault(name, {})[entry["faction"]] = value
+        elif op == "influence":
+            state["influence"][name] = value
+
+    def _record(self, entry: dict):
+        with self._lock:
+            self.seq += 1
+            entry = dict(entry, seq=self.seq)
+            self._apply(self._state, entry)
+            self.journal.append(entry)
+            if len(self.journal) >= self.checkpoint_every:
+                self._fold()
+
+    def _fold(self):
+        for entry in self.journal:
+            self._apply(self._checkpoint, entry)
+        self.journal = []
+
+    def checkpoint(self):
+        """Folds the journal into the checkpoint now."""
+        with self._lock:
+            self._fold()
+
+    # 💾 Save / Load
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "seq": self.seq,
+                "checkpoint": copy.deepcopy(self._checkpoint),
+                "journal": [dict(entry) for entry in self.journal],
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict, checkpoint_every: int = CHECKPOINT_EVERY):
+        """Rebuilds the state from a checkpoint and its journal (a missing or empty dict gives a fresh world)."""
+        world_state = cls(checkpoint_every)
+        if not data:
+            return world_state
+        checkpoint = data.get("checkpoint") or {}
+        for key in world_state._checkpoint:
+            world_state._checkpoint[key] = copy.deepcopy(checkpoint.get(key, {}))
+        world_state._state = copy.deepcopy(world_state._checkpoint)
+        for entry in data.get("journal", []):
+            world_state._apply(world_state._state, entry)
+            world_state.journal.append(dict(entry))
+        world_state.seq = data.get("seq", len(world_state.journal))
+        return world_state